@@ -0,0 +1,132 @@
+import csv
+import io
+import json
+import zlib
+
+from django.db.models import Q
+
+from audit.models import AuditLog
+
+EXPORT_FIELDS = [
+    "id", "action", "feature_name", "namespace", "new_value", "performed_by", "performed_by_id", "created_at",
+]
+EXPORT_FORMATS = ("ndjson", "csv")
+
+BATCH_SIZE = 5000           # rows per keyset query
+CURSOR_CHUNK_SIZE = 1000    # rows per fetch from the server-side cursor
+GZIP_FLUSH_BYTES = 64 * 1024
+
+
+def max_audit_id(created_before=None):
+    # upper bound fixed at the start of an export, rows inserted afterwards wait for the next run
+    queryset = AuditLog.objects.all()
+    if created_before is not None:
+        queryset = queryset.filter(created_at__lt=created_before)
+
+    last = queryset.order_by("-id").values_list("id", flat=True).first()
+    return last or 0
+
+
+def namespace_filter(allowed_namespaces):
+    """
+    Q matching the audit rows of AdminUser.namespaces ("prod/checkout", "prod/*"), None for all.
+    """
+    if not allowed_namespaces:
+        return None
+
+    condition = Q(pk__in=[])
+    for namespace in allowed_namespaces:
+        if namespace.endswith("/*"):
+            condition |= Q(namespace__startswith=namespace[:-1])
+        else:
+            condition |= Q(namespace=namespace)
+    return condition
+
+
+def iter_audit_rows(after_id=0, until_id=None, batch_size=BATCH_SIZE, namespaces=None):
+    """
+    Yield AuditLog rows as tuples (EXPORT_FIELDS order) with after_id < id <= until_id,
+    limited to `namespaces` (AdminUser.namespaces format) when given.
+
+    Keyset pagination: every batch is a short "WHERE id > last ORDER BY id LIMIT n" query,
+    read through a server-side cursor, so memory stays constant and no long lock is held.
+    """
+    if until_id is None:
+        until_id = max_audit_id()
+
+    condition = namespace_filter(namespaces)
+
+    last_id = after_id
+    while last_id < until_id:
+        queryset = AuditLog.objects.filter(id__gt=last_id, id__lte=until_id)
+        if condition is not None:
+            queryset = queryset.filter(condition)
+        batch = queryset.order_by("id").values_list(*EXPORT_FIELDS)[:batch_size]
+
+        count = 0
+        for row in batch.iterator(chunk_size=CURSOR_CHUNK_SIZE):
+            count += 1
+            last_id = row[0]
+            yield row
+
+        if count < batch_size:
+            return
+
+
+def _as_dict(row):
+    record = dict(zip(EXPORT_FIELDS, row))
+    record["created_at"] = record["created_at"].isoformat()
+    return record
+
+
+def encode_rows(rows, export_format="ndjson"):
+    """Yield one encoded line (bytes) per row; CSV starts with a header line, always."""
+    if export_format == "ndjson":
+        for row in rows:
+            yield (json.dumps(_as_dict(row)) + "\n").encode("utf-8")
+        return
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+    yield buffer.getvalue().encode("utf-8")             # header even when there are no rows
+    buffer.seek(0)
+    buffer.truncate()
+
+    for row in rows:
+        writer.writerow(_as_dict(row).values())
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+
+
+def gzip_stream(lines, flush_bytes=GZIP_FLUSH_BYTES):
+    """Compress an iterable of bytes into a gzip stream, yielding roughly flush_bytes at a time."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)       # wbits 31 → gzip container
+    pending = []
+    pending_size = 0
+
+    for line in lines:
+        pending.append(line)
+        pending_size += len(line)
+
+        if pending_size >= flush_bytes:
+            compressed = compressor.compress(b"".join(pending))
+            pending, pending_size = [], 0
+            if compressed:
+                yield compressed
+
+    yield compressor.compress(b"".join(pending)) + compressor.flush()
+
+
+def delete_archived(first_id, last_id, batch_size=1000):
+    """Delete first_id <= id <= last_id in small id ranges so each DELETE is short. Returns rows deleted."""
+    deleted = 0
+    start = first_id - 1
+    while start < last_id:
+        end = min(start + batch_size, last_id)
+        count, _ = AuditLog.objects.filter(id__gt=start, id__lte=end).delete()
+        deleted += count
+        start = end
+
+    return deleted
@@ -0,0 +1,125 @@
+import itertools
+import json
+import os
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from audit import export
+
+CHECKPOINT_FILE = "checkpoint.json"
+
+
+class Command(BaseCommand):
+    help = (
+        "Export the audit log to gzip-compressed NDJSON/CSV files of --chunk-rows rows each, "
+        "resumable from a checkpoint, optionally deleting archived rows afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("output_dir", help="Directory for the chunk files and the checkpoint")
+        parser.add_argument("--format", choices=export.EXPORT_FORMATS, default="ndjson")
+        parser.add_argument("--chunk-rows", type=int, default=100_000, help="Rows per output file")
+        parser.add_argument("--batch-size", type=int, default=export.BATCH_SIZE, help="Rows per keyset query")
+        parser.add_argument("--older-than-days", type=int, help="Only archive rows older than this")
+        parser.add_argument("--delete", action="store_true", help="Delete rows once their chunk is written")
+        parser.add_argument("--delete-batch", type=int, default=1000, help="Rows per DELETE statement")
+        parser.add_argument("--restart", action="store_true", help="Ignore an existing checkpoint")
+
+    def handle(self, *args, **options):
+        output_dir = options["output_dir"]
+        os.makedirs(output_dir, exist_ok=True)
+        checkpoint_path = os.path.join(output_dir, CHECKPOINT_FILE)
+
+        if options["chunk_rows"] <= 0 or options["batch_size"] <= 0:
+            raise CommandError("--chunk-rows and --batch-size must be positive")
+
+        checkpoint = {"last_id": 0, "deleted_through": 0, "chunks": 0}
+        if os.path.exists(checkpoint_path) and not options["restart"]:
+            with open(checkpoint_path) as f:
+                checkpoint.update(json.load(f))
+            self.stdout.write(f"Resuming after id {checkpoint['last_id']}")
+
+        total_deleted = 0
+        if options["delete"] and checkpoint["deleted_through"] < checkpoint["last_id"]:
+            # previous run stopped between writing a chunk and deleting its rows
+            total_deleted += export.delete_archived(
+                checkpoint["deleted_through"] + 1, checkpoint["last_id"], options["delete_batch"]
+            )
+            checkpoint["deleted_through"] = checkpoint["last_id"]
+            self._save_checkpoint(checkpoint_path, checkpoint)
+
+        created_before = None
+        if options["older_than_days"] is not None:
+            created_before = timezone.now() - timedelta(days=options["older_than_days"])
+
+        until_id = export.max_audit_id(created_before)
+        rows = export.iter_audit_rows(
+            after_id=checkpoint["last_id"],
+            until_id=until_id,
+            batch_size=options["batch_size"],
+        )
+
+        extension = f"{options['format']}.gz"
+        total_rows = 0
+
+        while True:
+            chunk = _ChunkRows(itertools.islice(rows, options["chunk_rows"]))
+
+            # stream the chunk into a temp file, name it once the id range is known
+            # (pid in the name: two runs on one directory never write into each other's file)
+            tmp_path = os.path.join(output_dir, f"auditlog-partial.{os.getpid()}.{extension}.tmp")
+            with open(tmp_path, "wb") as f:
+                for data in export.gzip_stream(export.encode_rows(chunk, options["format"])):
+                    f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+
+            if not chunk.count:
+                os.unlink(tmp_path)
+                break
+
+            # rename → checkpoint → delete: a crash at any point leaves a resumable state
+            path = os.path.join(output_dir, f"auditlog-{chunk.first_id:012d}-{chunk.last_id:012d}.{extension}")
+            os.replace(tmp_path, path)
+
+            checkpoint["last_id"] = chunk.last_id
+            checkpoint["chunks"] += 1
+            self._save_checkpoint(checkpoint_path, checkpoint)
+
+            total_rows += chunk.count
+            self.stdout.write(f"Wrote {chunk.count} rows to {path}")
+
+            if options["delete"]:
+                total_deleted += export.delete_archived(chunk.first_id, chunk.last_id, options["delete_batch"])
+                checkpoint["deleted_through"] = chunk.last_id
+                self._save_checkpoint(checkpoint_path, checkpoint)
+
+        self.stdout.write(
+            f"Exported {total_rows} rows up to id {checkpoint['last_id']}"
+            + (f", deleted {total_deleted}" if options["delete"] else "")
+        )
+
+    def _save_checkpoint(self, checkpoint_path, checkpoint):
+        tmp_path = f"{checkpoint_path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(checkpoint, f)
+        os.replace(tmp_path, checkpoint_path)
+
+
+class _ChunkRows:
+    # passes rows through while remembering the id range and count of the chunk
+    def __init__(self, rows):
+        self._rows = rows
+        self.first_id = None
+        self.last_id = None
+        self.count = 0
+
+    def __iter__(self):
+        for row in self._rows:
+            if self.first_id is None:
+                self.first_id = row[0]
+            self.last_id = row[0]
+            self.count += 1
+            yield row
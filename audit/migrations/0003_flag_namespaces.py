@@ -0,0 +1,23 @@
+# Generated by Django 6.0.1 on 2026-10-19 09:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit', '0002_adminuser'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='adminuser',
+            name='namespaces',
+            field=models.JSONField(blank=True, default=list),
+        ),
+        migrations.AddField(
+            model_name='auditlog',
+            name='namespace',
+            field=models.CharField(default='default', max_length=255),
+        ),
+    ]
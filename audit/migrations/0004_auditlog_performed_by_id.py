@@ -0,0 +1,18 @@
+# Generated by Django 6.0.1 on 2026-10-19 14:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('audit', '0003_flag_namespaces'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='auditlog',
+            name='performed_by_id',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+    ]
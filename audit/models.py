@@ -13,8 +13,12 @@ class AuditLog(models.Model):                     # AuditLog model to store feat
     feature_name = models.CharField(max_length=255)
     new_value = models.BooleanField(null=True, blank=True)
 
+    # "default" or "{environment}/{project}"
+    namespace = models.CharField(max_length=255, default="default")
+
     # For now: store admin identity as string (API key label / name later)
     performed_by = models.CharField(max_length=255)
+    performed_by_id = models.IntegerField(null=True, blank=True)      # AdminUser.id, survives renames
 
     created_at = models.DateTimeField(auto_now_add=True)
 
@@ -26,6 +30,7 @@ class AdminUser(models.Model):                                 # AdminUser model
     name = models.CharField(max_length=100)
     api_key = models.CharField(max_length=64, unique=True)
     scopes = models.JSONField(default=list)
+    namespaces = models.JSONField(default=list, blank=True)       # empty = all namespaces, "prod/*" = every project in prod
     is_active = models.BooleanField(default=True)
 
     created_at = models.DateTimeField(auto_now_add=True)
@@ -33,5 +38,12 @@ class AdminUser(models.Model):                                 # AdminUser model
     def has_scope(self, scope: str) -> bool:
         return scope in self.scopes
 
+    def has_namespace(self, namespace: str) -> bool:
+        if not self.namespaces:
+            return True
+
+        environment = namespace.split("/", 1)[0]
+        return namespace in self.namespaces or f"{environment}/*" in self.namespaces
+
     def __str__(self):
         return f"{self.name} ({','.join(self.scopes)})"
@@ -1,3 +1,186 @@
-from django.test import TestCase
+import csv
+import gzip
+import io
+import json
+import os
+import shutil
+import tempfile
 
-# Create your tests here.
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+
+from audit import export
+from audit.models import AdminUser, AuditLog
+from audit.utils import log_audit_event
+from flags.tests import FakeRedisMixin
+
+
+class AdminNamespaceTests(SimpleTestCase):
+    def test_no_namespaces_means_all(self):
+        self.assertTrue(AdminUser(namespaces=[]).has_namespace("prod/checkout"))
+
+    def test_exact_namespace(self):
+        admin = AdminUser(namespaces=["prod/checkout"])
+        self.assertTrue(admin.has_namespace("prod/checkout"))
+        self.assertFalse(admin.has_namespace("prod/search"))
+        self.assertFalse(admin.has_namespace("default"))
+
+    def test_environment_wildcard(self):
+        admin = AdminUser(namespaces=["staging/*"])
+        self.assertTrue(admin.has_namespace("staging/checkout"))
+        self.assertFalse(admin.has_namespace("prod/checkout"))
+        self.assertFalse(admin.has_namespace("stagingx/checkout"))
+
+
+class LogAuditEventTests(TestCase):
+    def test_event_is_stored(self):
+        log_audit_event("UPDATE", "dark_mode", True, "admin", performed_by_id=7, namespace="prod/checkout")
+
+        entry = AuditLog.objects.get()
+        self.assertEqual(entry.performed_by, "admin")
+        self.assertEqual(entry.performed_by_id, 7)
+        self.assertEqual(entry.namespace, "prod/checkout")
+
+
+class AuditExportTests(TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        for i in range(10):
+            AuditLog.objects.create(action="UPDATE", feature_name=f"flag_{i}", new_value=True, performed_by="admin")
+        self.ids = list(AuditLog.objects.order_by("id").values_list("id", flat=True))
+
+    def _export(self, *args):
+        call_command("export_audit_log", self.directory, *args, stdout=io.StringIO())
+
+    def _chunks(self):
+        return sorted(name for name in os.listdir(self.directory) if name.startswith("auditlog-"))
+
+    def _read_chunk(self, name):
+        with gzip.open(os.path.join(self.directory, name), "rt") as f:
+            return f.read()
+
+    def _checkpoint(self):
+        with open(os.path.join(self.directory, "checkpoint.json")) as f:
+            return json.load(f)
+
+    def test_keyset_boundaries(self):
+        # after_id is exclusive, until_id inclusive, batches smaller than / equal to the range
+        for batch_size in (1, 3, 5, 100):
+            with self.subTest(batch_size=batch_size):
+                rows = export.iter_audit_rows(after_id=self.ids[2], until_id=self.ids[7], batch_size=batch_size)
+                self.assertEqual([row[0] for row in rows], self.ids[3:8])
+
+    def test_keyset_skips_id_gaps(self):
+        AuditLog.objects.filter(id__in=self.ids[3:6]).delete()
+        rows = export.iter_audit_rows(batch_size=2)
+        self.assertEqual([row[0] for row in rows], self.ids[:3] + self.ids[6:])
+
+    def test_delete_archived_stays_in_range(self):
+        deleted = export.delete_archived(self.ids[2], self.ids[8], batch_size=2)
+
+        self.assertEqual(deleted, 7)
+        remaining = list(AuditLog.objects.order_by("id").values_list("id", flat=True))
+        self.assertEqual(remaining, self.ids[:2] + self.ids[9:])
+
+    def test_ndjson_chunks_and_checkpoint(self):
+        self._export("--chunk-rows", "4", "--batch-size", "3")
+
+        chunks = self._chunks()
+        self.assertEqual(len(chunks), 3)
+        lines = [json.loads(line) for name in chunks for line in self._read_chunk(name).splitlines()]
+        self.assertEqual([line["id"] for line in lines], self.ids)
+        self.assertEqual(self._checkpoint()["last_id"], self.ids[-1])
+        self.assertFalse([name for name in os.listdir(self.directory) if name.endswith(".tmp")])
+
+    def test_csv_header_in_every_chunk(self):
+        self._export("--format", "csv", "--chunk-rows", "4")
+
+        for name in self._chunks():
+            rows = list(csv.reader(io.StringIO(self._read_chunk(name))))
+            self.assertEqual(rows[0], export.EXPORT_FIELDS)
+            self.assertTrue(1 <= len(rows) - 1 <= 4)
+
+    def test_resume_continues_after_checkpoint(self):
+        self._export("--chunk-rows", "4")
+        for i in range(3):
+            AuditLog.objects.create(action="CREATE", feature_name=f"late_{i}", performed_by="admin")
+
+        self._export("--chunk-rows", "4")
+
+        lines = [json.loads(line) for name in self._chunks() for line in self._read_chunk(name).splitlines()]
+        self.assertEqual(len(lines), 13)
+        self.assertEqual(len({line["id"] for line in lines}), 13)
+
+    def test_resume_after_crash_between_rename_and_delete(self):
+        # first chunk renamed + checkpointed, but its rows were never deleted
+        self._export("--chunk-rows", "4")
+        checkpoint = self._checkpoint()
+        with open(os.path.join(self.directory, "checkpoint.json"), "w") as f:
+            json.dump({**checkpoint, "last_id": self.ids[3], "deleted_through": 0, "chunks": 1}, f)
+        for name in self._chunks()[1:]:
+            os.unlink(os.path.join(self.directory, name))
+
+        self._export("--chunk-rows", "4", "--delete", "--delete-batch", "3")
+
+        self.assertEqual(AuditLog.objects.count(), 0)
+        self.assertEqual(len(self._chunks()), 3)
+        checkpoint = self._checkpoint()
+        self.assertEqual(checkpoint["last_id"], self.ids[-1])
+        self.assertEqual(checkpoint["deleted_through"], self.ids[-1])
+
+    def test_resume_after_crash_before_checkpoint(self):
+        # chunk written but checkpoint not saved → the range is exported again into the same file
+        self._export("--chunk-rows", "4")
+        os.unlink(os.path.join(self.directory, "checkpoint.json"))
+
+        self._export("--chunk-rows", "4", "--delete")
+
+        self.assertEqual(len(self._chunks()), 3)
+        self.assertEqual(AuditLog.objects.count(), 0)
+
+
+class EncodeRowsTests(SimpleTestCase):
+    def test_csv_header_without_rows(self):
+        lines = list(export.encode_rows([], "csv"))
+        self.assertEqual(b"".join(lines).decode("utf-8").splitlines(), [",".join(export.EXPORT_FIELDS)])
+
+    def test_ndjson_without_rows_is_empty(self):
+        self.assertEqual(list(export.encode_rows([], "ndjson")), [])
+
+
+class AuditExportViewTests(FakeRedisMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        for namespace in ("default", "prod/shop", "prod/search", "dev/shop"):
+            AuditLog.objects.create(
+                action="UPDATE", feature_name="f", new_value=True, performed_by="admin",
+                performed_by_id=7, namespace=namespace,
+            )
+
+    def _export(self, namespaces):
+        key = f"key-{len(namespaces)}-{'-'.join(namespaces)}"
+        AdminUser.objects.create(name="auditor", api_key=key, scopes=["audit"], namespaces=namespaces)
+        response = self.client.get("/audit/export/", HTTP_X_ADMIN_KEY=key)
+        if response.status_code != 200:
+            return response.status_code, None
+
+        lines = gzip.decompress(b"".join(response.streaming_content)).decode("utf-8").splitlines()
+        return 200, [json.loads(line) for line in lines]
+
+    def test_unrestricted_admin_gets_every_namespace(self):
+        status, rows = self._export([])
+        self.assertEqual(status, 200)
+        self.assertEqual(len(rows), 4)
+        self.assertEqual(rows[0]["performed_by_id"], 7)
+
+    def test_rows_are_limited_to_the_admins_namespaces(self):
+        for namespaces, expected in (
+            (["default"], ["default"]),
+            (["prod/*"], ["prod/shop", "prod/search"]),
+            (["prod/shop", "dev/*"], ["prod/shop", "dev/shop"]),
+        ):
+            with self.subTest(namespaces=namespaces):
+                status, rows = self._export(namespaces)
+                self.assertEqual(status, 200)
+                self.assertEqual([row["namespace"] for row in rows], expected)
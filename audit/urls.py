@@ -0,0 +1,5 @@
+from django.urls import path
+from . import views
+urlpatterns = [
+    path('export/', views.export_audit_log, name='export_audit_log'),
+]
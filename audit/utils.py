@@ -1,6 +1,7 @@
 from audit.models import AuditLog
+from flags import tracing
 
-def log_audit_event(action, feature_name, new_value, performed_by , performed_by_id = None):
+def log_audit_event(action, feature_name, new_value, performed_by , performed_by_id = None, namespace = "default"):
     """
     Utility function to log an audit event.
     
@@ -9,15 +10,19 @@ def log_audit_event(action, feature_name, new_value, performed_by , performed_by
     - feature_name: The name of the feature flag affected
     - new_value: The new value of the feature flag (if applicable)
     - performed_by: The identity of the admin performing the action
+    - performed_by_id: The AdminUser id of that admin
+    - namespace: The flag namespace ("default" or "{environment}/{project}")
     """
     try:
-        AuditLog.objects.create(
-            action=action,
-            feature_name=feature_name,
-            new_value=new_value,
-            performed_by=performed_by,
-            performed_by_id=performed_by_id
-        )
+        with tracing.stage("audit"):
+            AuditLog.objects.create(
+                action=action,
+                feature_name=feature_name,
+                new_value=new_value,
+                performed_by=performed_by,
+                performed_by_id=performed_by_id,
+                namespace=namespace
+            )
     except Exception: 
         # audit must NEVER break main flow 
         pass
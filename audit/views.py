@@ -1,3 +1,47 @@
-from django.shortcuts import render
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
+
+from audit import export
+from flags.auth import admin_required, require_scope
+from flags.rate_limit import admin_rate_limit
+
 
 # Create your views here.
+@csrf_exempt
+@admin_required
+@admin_rate_limit
+@require_scope("audit", namespaced=False)             # rows are filtered by the admin's namespaces below
+def export_audit_log(request):
+    if request.method != "GET":
+        return JsonResponse(
+            {"error": "Invalid request method"},
+            status=405
+        )
+
+    export_format = request.GET.get("format", "ndjson")
+    if export_format not in export.EXPORT_FORMATS:
+        return JsonResponse(
+            {"error": f"Unsupported format, use one of: {', '.join(export.EXPORT_FORMATS)}"},
+            status=400
+        )
+
+    try:
+        after_id = int(request.GET.get("after_id", 0))          # resume: last id received by the client
+    except ValueError:
+        return JsonResponse(
+            {"error": '"after_id" must be an integer'},
+            status=400
+        )
+
+    until_id = export.max_audit_id()
+    rows = export.iter_audit_rows(after_id=after_id, until_id=until_id, namespaces=request.admin.namespaces)
+
+    response = StreamingHttpResponse(
+        export.gzip_stream(export.encode_rows(rows, export_format)),
+        content_type="application/gzip"
+    )
+    response["Content-Disposition"] = (
+        f'attachment; filename="auditlog-{after_id + 1}-{until_id}.{export_format}.gz"'
+    )
+    response["X-Export-Until-Id"] = str(until_id)
+    return response
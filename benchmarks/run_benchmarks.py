@@ -0,0 +1,348 @@
+"""
+Load-test and micro-benchmark suite for the flag service.
+
+Runs the real Django views in-process against fakeredis and an embedded SQLite database,
+then reports p50/p95/p99 latency and requests/sec for every scenario and writes the
+numbers to a JSON file so two commits can be compared.
+
+Usage (from the repository root):
+
+    pip install fakeredis
+    python -m benchmarks.run_benchmarks
+    python -m benchmarks.run_benchmarks --quick
+    python -m benchmarks.run_benchmarks --compare benchmarks/results/<older>.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+os.environ["DJANGO_SETTINGS_MODULE"] = "benchmarks.settings"
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+ADMIN_KEY = "benchmark-admin-key"
+LIST_SIZES = (1_000, 10_000, 100_000)
+MIN_LIST_RUNS = 30          # samples per listing scenario, however large the namespace
+
+# below these sample counts a percentile is just the slowest few runs → reported as null
+MIN_SAMPLES_P95 = 20
+MIN_SAMPLES_P99 = 100
+
+
+def setup():
+    """
+    Point the service at fakeredis and a fresh SQLite database.
+
+    The fake client has to be installed before Django imports the views, because they
+    bind `redis_client` at import time.
+    """
+    try:
+        import fakeredis
+    except ImportError:
+        sys.exit("fakeredis is required for the benchmark suite: pip install fakeredis")
+
+    import flags.redis_client
+
+    server = fakeredis.FakeServer()
+    flags.redis_client.redis_client = fakeredis.FakeRedis(server=server, decode_responses=True)
+
+    import django
+    django.setup()
+
+    from django.core.management import call_command
+    call_command("migrate", verbosity=0)
+
+    from audit.models import AdminUser
+    AdminUser.objects.get_or_create(
+        api_key=ADMIN_KEY,
+        defaults={"name": "benchmark", "scopes": ["read", "write", "delete"]},
+    )
+
+    # the admin limiter allows 30 req/min, which would turn every write scenario into 429s
+    from flags import rate_limit
+    rate_limit.RATE_LIMIT = 10 ** 9
+
+    return server, flags.redis_client.redis_client
+
+
+def summarize(latencies_ns, wall_seconds):
+    latencies = sorted(latencies_ns)
+    count = len(latencies)
+
+    def percentile(p):
+        return latencies[min(count - 1, int(count * p / 100))] / 1000
+
+    return {
+        "requests": count,
+        "p50_us": round(percentile(50), 1),
+        "p95_us": round(percentile(95), 1) if count >= MIN_SAMPLES_P95 else None,
+        "p99_us": round(percentile(99), 1) if count >= MIN_SAMPLES_P99 else None,
+        "mean_us": round(sum(latencies) / count / 1000, 1),
+        "requests_per_sec": round(count / wall_seconds, 1),
+    }
+
+
+def measure(call, iterations, warmup=20):
+    for _ in range(warmup):
+        call()
+
+    latencies = []
+    started = time.perf_counter()
+    for _ in range(iterations):
+        t0 = time.perf_counter_ns()
+        call()
+        latencies.append(time.perf_counter_ns() - t0)
+    wall = time.perf_counter() - started
+
+    return summarize(latencies, wall)
+
+
+def expect(response, status):
+    if response.status_code != status:
+        raise RuntimeError(f"Unexpected status {response.status_code}: {response.content[:200]!r}")
+    return response
+
+
+def seed_namespace(redis_client, namespace, size):
+    from flags import namespaces, utils
+
+    pipe = redis_client.pipeline(transaction=False)
+    for i in range(size):
+        name = f"flag_{i}"
+        pipe.set(utils.redis_key_generator("feature", name, namespace), "1" if i % 2 else "0")
+        namespaces.index_feature(namespace, name, pipe)
+        if i % 5000 == 4999:
+            pipe.execute()
+    pipe.execute()
+
+
+def bench_status(client, server, redis_client, iterations):
+    from flags.local_cache import LOCAL_FEATURE_CACHE
+
+    redis_client.set("feature:bench_legacy", "1")
+    redis_client.set("feature:bench_json", json.dumps({"enabled": True, "deleted": False}))
+
+    results = {
+        "status_legacy": measure(
+            lambda: expect(client.get("/flags/feature/status/bench_legacy/"), 200), iterations),
+        "status_json": measure(
+            lambda: expect(client.get("/flags/feature/status/bench_json/"), 200), iterations),
+        "status_miss": measure(
+            lambda: expect(client.get("/flags/feature/status/bench_missing/"), 200), iterations),
+    }
+
+    etag = client.get("/flags/feature/status/bench_legacy/")["ETag"]
+    results["status_not_modified"] = measure(
+        lambda: expect(client.get("/flags/feature/status/bench_legacy/", HTTP_IF_NONE_MATCH=etag), 304), iterations)
+
+    server.connected = False
+    try:
+        results["status_redis_down_cached"] = measure(
+            lambda: expect(client.get("/flags/feature/status/bench_legacy/"), 200), iterations)
+
+        LOCAL_FEATURE_CACHE.pop("feature:bench_json", None)
+        results["status_redis_down_uncached"] = measure(
+            lambda: expect(client.get("/flags/feature/status/bench_json/"), 200), iterations)
+    finally:
+        server.connected = True
+
+    return results
+
+
+def bench_list(admin_client, redis_client, sizes, iterations):
+    results = {}
+    for size in sizes:
+        project = f"list{size}"
+        seed_namespace(redis_client, f"bench/{project}", size)
+
+        url = f"/flags/ns/bench/{project}/feature/list/"
+        runs = max(MIN_LIST_RUNS, iterations * 1_000 // size // 10)
+        results[f"list_all_features_{size}"] = measure(
+            lambda: expect(admin_client.get(url), 200), runs, warmup=2)
+
+    return results
+
+
+def bench_admin_writes(admin_client, iterations):
+    state = {"enabled": False, "created": 0}
+
+    def toggle():
+        state["enabled"] = not state["enabled"]
+        expect(admin_client.patch(
+            "/flags/feature/change-state/bench_write/",
+            json.dumps({"enabled": state["enabled"]}),
+            content_type="application/json",
+        ), 200)
+
+    def create():
+        state["created"] += 1
+        expect(admin_client.post(
+            f"/flags/feature/initialize/bench_created_{state['created']}/",
+            "{}",
+            content_type="application/json",
+        ), 201)
+
+    expect(admin_client.post("/flags/feature/initialize/bench_write/", "{}", content_type="application/json"), 201)
+
+    return {
+        "admin_change_state": measure(toggle, iterations),
+        "admin_initialize": measure(create, iterations),
+    }
+
+
+def bench_mixed(redis_client, threads, iterations):
+    """
+    Concurrent mixed workload: 90% status checks, 8% small listings, 2% admin writes.
+    """
+    from django.db import connection
+    from django.test import Client
+
+    seed_namespace(redis_client, "bench/mixed", 100)
+    for i in range(100):
+        redis_client.set(f"feature:mixed_{i}", "1" if i % 2 else "0")
+
+    per_thread = max(1, iterations // threads)
+    latencies = {"status": [], "list": [], "write": []}
+    lock = threading.Lock()
+    errors = []
+
+    def worker(seed):
+        rng = random.Random(seed)
+        client = Client()
+        admin_client = Client(HTTP_X_ADMIN_KEY=ADMIN_KEY)
+        local = {"status": [], "list": [], "write": []}
+
+        try:
+            for _ in range(per_thread):
+                roll = rng.random()
+                t0 = time.perf_counter_ns()
+                if roll < 0.90:
+                    kind = "status"
+                    expect(client.get(f"/flags/feature/status/mixed_{rng.randrange(100)}/"), 200)
+                elif roll < 0.98:
+                    kind = "list"
+                    expect(admin_client.get("/flags/ns/bench/mixed/feature/list/"), 200)
+                else:
+                    kind = "write"
+                    expect(admin_client.patch(
+                        f"/flags/feature/change-state/mixed_{rng.randrange(100)}/",
+                        json.dumps({"enabled": rng.random() < 0.5}),
+                        content_type="application/json",
+                    ), 200)
+                local[kind].append(time.perf_counter_ns() - t0)
+        except Exception as exc:
+            errors.append(exc)
+        finally:
+            connection.close()
+
+        with lock:
+            for kind, values in local.items():
+                latencies[kind].extend(values)
+
+    workers = [threading.Thread(target=worker, args=(seed,)) for seed in range(threads)]
+    started = time.perf_counter()
+    for t in workers:
+        t.start()
+    for t in workers:
+        t.join()
+    wall = time.perf_counter() - started
+
+    if errors:
+        raise errors[0]
+
+    results = {f"mixed_{threads}t_total": summarize([v for values in latencies.values() for v in values], wall)}
+    for kind, values in latencies.items():
+        if values:
+            results[f"mixed_{threads}t_{kind}"] = summarize(values, wall)
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=Path(__file__).resolve().parent,
+            stderr=subprocess.DEVNULL,
+            text=True,
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def print_results(results, baseline=None):
+    header = f"{'scenario':<34}{'p50 us':>10}{'p95 us':>10}{'p99 us':>10}{'req/s':>12}"
+    if baseline:
+        header += f"{'p50 Δ':>9}{'req/s Δ':>9}"
+    print(header)
+    print("-" * len(header))
+
+    for name, r in results.items():
+        p95, p99 = (r[key] if r[key] is not None else "-" for key in ("p95_us", "p99_us"))
+        line = f"{name:<34}{r['p50_us']:>10}{p95:>10}{p99:>10}{r['requests_per_sec']:>12}"
+        old = (baseline or {}).get(name)
+        if old:
+            line += f"{(r['p50_us'] / old['p50_us'] - 1) * 100:>8.1f}%"
+            line += f"{(r['requests_per_sec'] / old['requests_per_sec'] - 1) * 100:>8.1f}%"
+        print(line)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=2000, help="requests per single-threaded scenario")
+    parser.add_argument("--threads", type=int, default=8, help="worker threads for the mixed workload")
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(LIST_SIZES), help="flag counts for list_all_features")
+    parser.add_argument("--quick", action="store_true", help="small run for a fast sanity check")
+    parser.add_argument("--output", type=Path, help="results file (default: benchmarks/results/<commit>-<timestamp>.json)")
+    parser.add_argument("--compare", type=Path, help="earlier results file to diff against")
+    args = parser.parse_args(argv)
+
+    if args.quick:
+        args.iterations = 200
+        args.sizes = [1_000]
+
+    server, redis_client = setup()
+
+    from django.test import Client
+    client = Client()
+    admin_client = Client(HTTP_X_ADMIN_KEY=ADMIN_KEY)
+
+    results = {}
+    results.update(bench_status(client, server, redis_client, args.iterations))
+    results.update(bench_list(admin_client, redis_client, args.sizes, args.iterations))
+    results.update(bench_admin_writes(admin_client, max(1, args.iterations // 4)))
+    results.update(bench_mixed(redis_client, args.threads, args.iterations))
+
+    baseline = None
+    if args.compare:
+        baseline = json.loads(args.compare.read_text())["results"]
+
+    print_results(results, baseline)
+
+    commit = git_commit()
+    report = {
+        "meta": {
+            "commit": commit,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "iterations": args.iterations,
+            "threads": args.threads,
+        },
+        "results": results,
+    }
+
+    output = args.output or RESULTS_DIR / f"{commit}-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(report, indent=2))
+    print(f"\nResults written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+"""
+Settings for the local benchmark suite.
+
+Same as config.settings (or config.settings_worker), but with an embedded SQLite database
+and no dependency on a .env file, Postgres or a running Redis (the runner swaps in fakeredis).
+"""
+
+import os
+import tempfile
+
+BENCH_DIR = os.environ.setdefault("FLAG_BENCH_DIR", tempfile.mkdtemp(prefix="flag-bench-"))
+
+os.environ.setdefault("DJANGO_SECRET_KEY", "benchmark-only-secret-key")
+
+# FLAG_BENCH_PROFILE=worker benchmarks the slim read-only worker profile
+if os.environ.get("FLAG_BENCH_PROFILE") == "worker":
+    from config.settings_worker import *  # noqa: E402,F401,F403
+else:
+    from config.settings import *  # noqa: E402,F401,F403
+
+DEBUG = False
+
+ALLOWED_HOSTS = ["testserver"]
+
+DATABASES = {
+    "default": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": os.path.join(BENCH_DIR, "bench.sqlite3"),
+        "OPTIONS": {"timeout": 30},
+    }
+}
+
+FLAG_SNAPSHOT_PATH = os.path.join(BENCH_DIR, "flag_snapshot.bin")
+FLAG_SNAPSHOT_INTERVAL = 0
@@ -0,0 +1,163 @@
+"""
+Startup benchmark: how long a fresh process needs before it serves its first flag check.
+
+Every run spawns a new interpreter that imports config.wsgi (settings, app registry, URLconf,
+middleware) and pushes one request for /flags/feature/status/<flag>/ through the WSGI app,
+against fakeredis and SQLite like the load suite. Reported per settings profile:
+
+    import_ms         import config.wsgi (django.setup + get_wsgi_application)
+    first_request_ms  first status request through the WSGI app
+    ready_ms          import_ms + first_request_ms
+    process_ms        wall time seen by the parent, including interpreter start and fakeredis
+
+Usage (from the repository root):
+
+    python -m benchmarks.startup_bench
+    python -m benchmarks.startup_bench --runs 20 --profiles full worker
+    python -m benchmarks.startup_bench --importtime     # slowest imports of one worker start
+"""
+
+import argparse
+import io
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+from benchmarks.run_benchmarks import RESULTS_DIR, git_commit
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+PROFILES = ("full", "worker")
+
+
+def child():
+    # runs inside the spawned process
+    os.environ["DJANGO_SETTINGS_MODULE"] = "benchmarks.settings"
+    started = time.perf_counter()
+
+    from config.wsgi import application
+    imported = time.perf_counter()
+
+    # the Redis client is lazy, so the fake can be attached after the app is loaded
+    # (keeps the fakeredis import out of the numbers)
+    import fakeredis
+    import flags.redis_client
+    flags.redis_client.redis_client._client = fakeredis.FakeRedis(decode_responses=True)
+    flags.redis_client.redis_client.set("feature:startup_flag", "1")
+    request_started = time.perf_counter()
+
+    status = {}
+    environ = {
+        "REQUEST_METHOD": "GET",
+        "PATH_INFO": "/flags/feature/status/startup_flag/",
+        "QUERY_STRING": "",
+        "SERVER_NAME": "testserver",
+        "SERVER_PORT": "80",
+        "HTTP_HOST": "testserver",
+        "wsgi.url_scheme": "http",
+        "wsgi.input": io.BytesIO(),
+        "wsgi.errors": sys.stderr,
+    }
+    body = b"".join(application(environ, lambda s, headers: status.setdefault("status", s)))
+    served = time.perf_counter()
+
+    if not status["status"].startswith("200") or b"True" not in body:
+        sys.exit(f"unexpected response: {status['status']} {body!r}")
+
+    print(json.dumps({
+        "import_ms": (imported - started) * 1000,
+        "first_request_ms": (served - request_started) * 1000,
+    }))
+
+
+def spawn(profile, extra_args=()):
+    env = dict(os.environ, FLAG_BENCH_PROFILE=profile, FLAG_SNAPSHOT_INTERVAL="0")
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, *extra_args, "-m", "benchmarks.startup_bench", "--child"],
+        cwd=REPO_ROOT,
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    elapsed = (time.perf_counter() - started) * 1000
+    return result, elapsed
+
+
+def measure(profile, runs):
+    samples = []
+    for _ in range(runs):
+        result, elapsed = spawn(profile)
+        sample = json.loads(result.stdout.strip().splitlines()[-1])
+        sample["ready_ms"] = sample["import_ms"] + sample["first_request_ms"]
+        sample["process_ms"] = elapsed
+        samples.append(sample)
+
+    return {
+        key: {
+            "median": round(statistics.median(s[key] for s in samples), 1),
+            "min": round(min(s[key] for s in samples), 1),
+            "max": round(max(s[key] for s in samples), 1),
+        }
+        for key in ("import_ms", "first_request_ms", "ready_ms", "process_ms")
+    }
+
+
+def print_importtime(profile, top=25):
+    result, _ = spawn(profile, ("-X", "importtime"))
+
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, module = line[len("import time:"):].split("|", 2)
+        rows.append((int(cumulative_us), int(self_us), module.rstrip()))
+
+    print(f"Slowest imports ({profile} profile), cumulative us / self us:")
+    for cumulative_us, self_us, module in sorted(rows, reverse=True)[:top]:
+        print(f"{cumulative_us:>10}{self_us:>10}  {module}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10, help="process starts per profile")
+    parser.add_argument("--profiles", nargs="+", choices=PROFILES, default=list(PROFILES))
+    parser.add_argument("--importtime", action="store_true", help="print the slowest imports instead")
+    parser.add_argument("--output", type=Path, help="results file (default: benchmarks/results/startup-<commit>-<timestamp>.json)")
+    parser.add_argument("--child", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.child:
+        child()
+        return
+
+    if args.importtime:
+        for profile in args.profiles:
+            print_importtime(profile)
+        return
+
+    results = {profile: measure(profile, args.runs) for profile in args.profiles}
+
+    print(f"{'profile':<10}{'import ms':>12}{'1st req ms':>12}{'ready ms':>12}{'process ms':>12}   (medians of {args.runs})")
+    for profile, r in results.items():
+        print(
+            f"{profile:<10}{r['import_ms']['median']:>12}{r['first_request_ms']['median']:>12}"
+            f"{r['ready_ms']['median']:>12}{r['process_ms']['median']:>12}"
+        )
+
+    commit = git_commit()
+    output = args.output or RESULTS_DIR / f"startup-{commit}-{time.strftime('%Y%m%d-%H%M%S')}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps({
+        "meta": {"commit": commit, "runs": args.runs, "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime())},
+        "results": results,
+    }, indent=2))
+    print(f"\nResults written to {output}")
+
+
+if __name__ == "__main__":
+    main()
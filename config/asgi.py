@@ -14,3 +14,12 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
 application = get_asgi_application()
+
+# background workers: on-disk flag snapshot + evaluation analytics flush, SIGUSR2 profiler
+from flags.snapshot import start_snapshot_writer  # noqa: E402
+from flags.analytics import start_analytics_flusher  # noqa: E402
+from flags.profiling import install_signal_handler  # noqa: E402
+
+start_snapshot_writer()
+start_analytics_flusher()
+install_signal_handler()
@@ -14,7 +14,7 @@ from pathlib import Path
 import os
 from dotenv import load_dotenv
 
-load_dotenv()
+load_dotenv()       # the only place .env is read, everything else uses django.conf.settings
 
 
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
@@ -47,6 +47,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'flags.tracing.SlowRequestMiddleware',             # removes itself when FLAG_SLOW_REQUEST_MS is 0
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -80,32 +81,17 @@ WSGI_APPLICATION = 'config.wsgi.application'
 # https://docs.djangoproject.com/en/6.0/ref/settings/#databases
 
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+    "default": {
+        "ENGINE": "django.db.backends.postgresql",
+        "NAME": os.getenv("DB_NAME"),
+        "USER": os.getenv("DB_USER"),
+        "PASSWORD": os.getenv("DB_PASSWORD"),
+        "HOST": os.getenv("DB_HOST"),
+        "PORT": os.getenv("DB_PORT"),
     }
 }
 
 
-# Password validation
-# https://docs.djangoproject.com/en/6.0/ref/settings/#auth-password-validators
-
-AUTH_PASSWORD_VALIDATORS = [
-    {
-        'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
-    },
-    {
-        'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
-    },
-    {
-        'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator',
-    },
-    {
-        'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
-    },
-]
-
-
 # Internationalization
 # https://docs.djangoproject.com/en/6.0/topics/i18n/
 
@@ -125,14 +111,31 @@ STATIC_URL = 'static/'
 
 ADMIN_API_KEY = os.getenv("ADMIN_API_KEY")
 
-# Database configuration 
-DATABASES = {
-    "default": {
-        "ENGINE": "django.db.backends.postgresql",
-        "NAME": os.getenv("DB_NAME"),
-        "USER": os.getenv("DB_USER"),
-        "PASSWORD": os.getenv("DB_PASSWORD"),
-        "HOST": os.getenv("DB_HOST"),
-        "PORT": os.getenv("DB_PORT"),
-    }
-}
+# Redis (client is created lazily on first use, see flags/redis_client.py)
+REDIS_HOST = os.getenv("REDIS_HOST", "localhost")
+REDIS_PORT = int(os.getenv("REDIS_PORT", "6379"))
+REDIS_DB = int(os.getenv("REDIS_DB", "0"))
+
+# Flag snapshot: local on-disk copy of all flags, loaded at boot and used when Redis is down
+FLAG_SNAPSHOT_PATH = os.getenv("FLAG_SNAPSHOT_PATH", str(BASE_DIR / "flag_snapshot.bin"))
+FLAG_SNAPSHOT_INTERVAL = int(os.getenv("FLAG_SNAPSHOT_INTERVAL", "60"))     # seconds, 0 disables the writer
+
+# Flag evaluation analytics: per-process counters pushed to Redis in one pipeline per interval
+FLAG_ANALYTICS_FLUSH_INTERVAL = int(os.getenv("FLAG_ANALYTICS_FLUSH_INTERVAL", "5"))   # seconds, 0 disables flushing
+
+# HTTP caching of the public flag status route (seconds)
+FLAG_STATUS_MAX_AGE = int(os.getenv("FLAG_STATUS_MAX_AGE", "5"))
+FLAG_STATUS_STALE_WHILE_REVALIDATE = int(os.getenv("FLAG_STATUS_STALE_WHILE_REVALIDATE", "30"))
+FLAG_STATUS_STALE_IF_ERROR = int(os.getenv("FLAG_STATUS_STALE_IF_ERROR", "300"))
+
+# Request coalescing: how long a request waits on someone else's in-flight Redis read (seconds)
+FLAG_SINGLEFLIGHT_TIMEOUT = float(os.getenv("FLAG_SINGLEFLIGHT_TIMEOUT", "2"))
+
+# Diagnostics: slow request log (0 disables) and on-demand sampling profiler (SIGUSR2 / debug scope endpoint)
+FLAG_SLOW_REQUEST_MS = float(os.getenv("FLAG_SLOW_REQUEST_MS", "0"))
+FLAG_PROFILE_DIR = os.getenv("FLAG_PROFILE_DIR", "/tmp")
+FLAG_PROFILE_SIGNAL_SECONDS = int(os.getenv("FLAG_PROFILE_SIGNAL_SECONDS", "10"))
+
+# Local flag sidecar (manage.py run_flag_sidecar)
+FLAG_SIDECAR_SOCKET = os.getenv("FLAG_SIDECAR_SOCKET", "/tmp/flag-sidecar.sock")
+FLAG_SIDECAR_RESYNC_INTERVAL = int(os.getenv("FLAG_SIDECAR_RESYNC_INTERVAL", "30"))   # seconds, 0 = pub/sub only
@@ -0,0 +1,29 @@
+"""
+Slim settings profile for read-only flag workers.
+
+Same configuration as config.settings, minus everything the public flag status route never
+touches: contrib admin/auth/sessions/messages/staticfiles, their middleware, templates and
+translations. Fewer apps to import and fewer middleware per request means a new pod is ready
+to serve sooner.
+
+    DJANGO_SETTINGS_MODULE=config.settings_worker gunicorn config.wsgi
+"""
+
+from .settings import *  # noqa: F401,F403
+
+INSTALLED_APPS = [
+    'flags',
+    'audit',
+]
+
+MIDDLEWARE = [
+    'flags.tracing.SlowRequestMiddleware',             # removes itself when FLAG_SLOW_REQUEST_MS is 0
+    'django.middleware.security.SecurityMiddleware',
+    'django.middleware.common.CommonMiddleware',
+]
+
+ROOT_URLCONF = 'config.urls_worker'
+
+TEMPLATES = []
+
+USE_I18N = False
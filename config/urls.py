@@ -19,5 +19,6 @@ from django.urls import path , include
 
 urlpatterns = [
     path('flags/', include('flags.urls')),      # added flag app url to project config
+    path('audit/', include('audit.urls')),
     path('admin/', admin.site.urls),
 ]
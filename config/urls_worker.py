@@ -0,0 +1,14 @@
+"""
+URL configuration for read-only flag workers (config.settings_worker).
+
+Only the public flag status routes; admin and write endpoints stay on the full profile.
+"""
+from django.urls import path
+
+from flags import views
+
+urlpatterns = [
+    path('flags/', views.home, name='home'),
+    path('flags/feature/status/<str:feature_name>/', views.is_feature_active, name='is_feature_active'),
+    path('flags/ns/<slug:environment>/<slug:project>/feature/status/<str:feature_name>/', views.is_feature_active, name='ns_is_feature_active'),
+]
@@ -0,0 +1,246 @@
+# flag evaluation analytics
+
+# flags/analytics.py
+#
+# is_feature_active records every evaluation of an existing flag here, in process memory only:
+#   - a count per (redis_key, result) in a table owned by the recording thread (threading.local),
+#     so the hot path takes no lock: only its own thread ever writes to a table
+#   - a set of caller ids per flag, turned into a HyperLogLog (PFADD) on flush
+# Misses are not recorded, so arbitrary names on the public route cannot grow the counters
+# or create stats keys in Redis.
+#
+# A background thread pushes the deltas to Redis in one pipeline every few seconds:
+#   flag_stats:{redis_key}    hash → evaluations / true / false / last_evaluated
+#   flag_callers:{redis_key}  HyperLogLog of caller ids
+#
+# The flusher never writes to the counts: it copies each table (dict.copy() is one C call, atomic
+# under the GIL) and pushes the difference to what it already flushed. Caller sets are swapped
+# out instead, so an id recorded during the swap can be missed; the HyperLogLog is an estimate anyway.
+
+import atexit
+import os
+import threading
+import time
+
+from django.conf import settings
+from redis.exceptions import RedisError
+
+from .redis_client import redis_client
+from . import namespaces
+from . import utils
+
+MAX_CALLERS_PER_FLUSH = 10_000       # per flag and thread, keeps memory bounded between flushes
+
+
+class _ThreadTable:
+    __slots__ = ("counts", "flushed", "callers", "thread")
+
+    def __init__(self):
+        self.counts = {}            # (redis_key, is_active) → evaluations, only grows
+        self.flushed = {}           # (redis_key, is_active) → part of counts already in Redis
+        self.callers = {}           # redis_key → set of caller ids since the last flush
+        self.thread = threading.current_thread()
+
+
+def _reset():
+    # fresh state: at import, and in a forked child (the parent's tables and locks are not ours)
+    global _local, _tables, _tables_lock, _flush_lock
+
+    _local = threading.local()
+    _tables = []                        # every thread's table, until its thread is gone and flushed
+    _tables_lock = threading.Lock()     # registration / pruning of _tables, not the hot path
+    _flush_lock = threading.Lock()      # one flush at a time
+
+
+_reset()
+_flusher_thread = None
+_atexit_registered = False
+
+
+def _register_thread():
+    table = _local.table = _ThreadTable()
+    with _tables_lock:
+        _tables.append(table)
+    return table
+
+
+def record(redis_key, is_active, caller=None):
+    # only call for flags that exist
+    try:
+        table = _local.table
+    except AttributeError:
+        table = _register_thread()
+
+    key = (redis_key, is_active)
+    counts = table.counts
+    counts[key] = counts.get(key, 0) + 1
+
+    if caller is not None:
+        callers = table.callers.get(redis_key)
+        if callers is None:
+            callers = table.callers[redis_key] = set()
+        if len(callers) < MAX_CALLERS_PER_FLUSH:
+            callers.add(caller)
+
+
+def flush():
+    """
+    Push everything recorded since the last flush to Redis in one pipelined batch.
+
+    Returns the number of flags flushed. On Redis failure the counts stay pending and
+    go out with the next flush (caller ids for that interval are dropped).
+    """
+    with _flush_lock:
+        with _tables_lock:
+            tables = list(_tables)
+
+        deltas = {}
+        callers = {}
+        copied = []
+        finished = []
+
+        for table in tables:
+            # a thread that is gone before the copy cannot record anymore → table can go after this flush
+            if not table.thread.is_alive():
+                finished.append(table)
+
+            counts = table.counts.copy()
+            copied.append((table, counts))
+            for key, total in counts.items():
+                delta = total - table.flushed.get(key, 0)
+                if delta:
+                    redis_key, is_active = key
+                    by_result = deltas.setdefault(redis_key, {})
+                    by_result[is_active] = by_result.get(is_active, 0) + delta
+
+            table_callers, table.callers = table.callers, {}
+            for redis_key, caller_ids in list(table_callers.items()):
+                callers.setdefault(redis_key, set()).update(list(caller_ids))
+
+        if deltas or callers:
+            now = time.time()
+            pipe = redis_client.pipeline(transaction=False)
+
+            for redis_key, by_result in deltas.items():
+                stats_key = utils.redis_key_generator("flag_stats", redis_key)
+                true_count = by_result.get(True, 0)
+                false_count = by_result.get(False, 0)
+
+                pipe.hincrby(stats_key, "evaluations", true_count + false_count)
+                if true_count:
+                    pipe.hincrby(stats_key, "true", true_count)
+                if false_count:
+                    pipe.hincrby(stats_key, "false", false_count)
+                pipe.hset(stats_key, "last_evaluated", now)
+
+            for redis_key, caller_ids in callers.items():
+                if caller_ids:
+                    pipe.pfadd(utils.redis_key_generator("flag_callers", redis_key), *caller_ids)
+
+            pipe.execute()
+
+        for table, counts in copied:
+            table.flushed.update(counts)
+
+        if finished:
+            with _tables_lock:
+                _tables[:] = [table for table in _tables if table not in finished]
+
+        return len(deltas)
+
+
+def flag_usage(namespace, stale_after):
+    """
+    Usage of every flag in a namespace, split into never evaluated / stale / active.
+
+    stale_after is in seconds; cost is one pipeline sized by the namespace.
+    """
+    feature_names = namespaces.namespace_features(namespace)
+    redis_keys = [utils.redis_key_generator("feature", name, namespace) for name in feature_names]
+
+    pipe = redis_client.pipeline(transaction=False)
+    for redis_key in redis_keys:
+        pipe.hgetall(utils.redis_key_generator("flag_stats", redis_key))
+        pipe.pfcount(utils.redis_key_generator("flag_callers", redis_key))
+    replies = pipe.execute()
+
+    cutoff = time.time() - stale_after
+    usage = {"never_evaluated": [], "stale": [], "active": []}
+
+    for index, feature_name in enumerate(feature_names):
+        stats = replies[index * 2]
+        unique_callers = replies[index * 2 + 1]
+
+        if not stats:
+            usage["never_evaluated"].append({"feature": feature_name})
+            continue
+
+        last_evaluated = float(stats.get("last_evaluated", 0))
+        entry = {
+            "feature": feature_name,
+            "evaluations": int(stats.get("evaluations", 0)),
+            "true": int(stats.get("true", 0)),
+            "false": int(stats.get("false", 0)),
+            "unique_callers": unique_callers,
+            "last_evaluated": last_evaluated,
+        }
+
+        usage["stale" if last_evaluated < cutoff else "active"].append(entry)
+
+    return usage
+
+
+def _flusher_loop(interval):
+    while True:
+        time.sleep(interval)
+        try:
+            flush()
+        except RedisError:
+            # Redis down → counts stay pending for the next round
+            pass
+
+
+def _flush_at_exit():
+    try:
+        flush()
+    except RedisError:
+        pass
+
+
+def start_analytics_flusher():
+    """
+    Start the background thread that flushes evaluation counts every
+    FLAG_ANALYTICS_FLUSH_INTERVAL seconds. Safe to call more than once.
+    """
+    global _flusher_thread, _atexit_registered
+
+    interval = getattr(settings, "FLAG_ANALYTICS_FLUSH_INTERVAL", 0)
+    if interval <= 0 or _flusher_thread is not None:
+        return
+
+    _flusher_thread = threading.Thread(
+        target=_flusher_loop,
+        args=(interval,),
+        name="flag-analytics-flusher",
+        daemon=True,
+    )
+    _flusher_thread.start()
+
+    if not _atexit_registered:
+        atexit.register(_flush_at_exit)
+        _atexit_registered = True
+
+
+def _restart_flusher_after_fork():
+    # a forked worker (gunicorn --preload) inherits _flusher_thread but not the thread itself,
+    # and counts recorded by the parent would be flushed twice
+    global _flusher_thread
+
+    _reset()
+    if _flusher_thread is not None:
+        _flusher_thread = None
+        start_analytics_flusher()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_restart_flusher_after_fork)
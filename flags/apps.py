@@ -3,3 +3,9 @@ from django.apps import AppConfig
 
 class FlagsConfig(AppConfig):
     name = 'flags'
+
+    def ready(self):
+        # map the on-disk snapshot so a cold start during a Redis outage serves the
+        # last known flag states instead of failing every flag closed
+        from . import snapshot
+        snapshot.load_snapshot()
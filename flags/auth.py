@@ -4,6 +4,8 @@
 
 from audit.models import AdminUser
 from django.http import JsonResponse
+from .utils import namespace_from
+from . import tracing
 
 def admin_required(view_func):
     def _wrapped_view(request, *args, **kwargs):
@@ -13,7 +15,8 @@ def admin_required(view_func):
             return JsonResponse({"error": "Missing admin API key"}, status=401)
 
         try:
-            admin = AdminUser.objects.get(api_key=api_key, is_active=True)                          # Check if the API key exists and is active in the AdminUser model
+            with tracing.stage("auth_db"):
+                admin = AdminUser.objects.get(api_key=api_key, is_active=True)                      # Check if the API key exists and is active in the AdminUser model
         except AdminUser.DoesNotExist:
             return JsonResponse({"error": "Invalid or inactive admin key"}, status=403)
 
@@ -28,7 +31,9 @@ def admin_required(view_func):
 
 # RBAC decorator to check if the admin has the required scope for the view 
 # RBAC : Role-Based Access Control 
-def require_scope(required_scope: str):
+# namespaced=False marks process-wide endpoints (diagnostics, audit export) that belong to no
+# flag namespace; they skip the namespace check and handle AdminUser.namespaces themselves.
+def require_scope(required_scope: str, namespaced: bool = True):
     def decorator(view_func):
         def _wrapped_view(request, *args, **kwargs):
             admin = getattr(request, "admin", None)
@@ -42,7 +47,15 @@ def require_scope(required_scope: str):
                     status=403
                 )
 
+            # flag routes: namespaced ones carry environment/project, legacy ones act on "default"
+            if namespaced:
+                namespace = namespace_from(kwargs.get("environment"), kwargs.get("project"))
+                if not admin.has_namespace(namespace):
+                    return JsonResponse(
+                        {"error": f"No access to namespace: {namespace}"},
+                        status=403
+                    )
+
             return view_func(request, *args, **kwargs)
         return _wrapped_view
     return decorator
-
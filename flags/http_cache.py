@@ -0,0 +1,120 @@
+# HTTP caching for the public flag status route
+
+# flags/http_cache.py
+#
+# is_feature_active responses carry:
+#   ETag           "{version}-{state}-{format}" → changes on every admin write to the flag
+#   Last-Modified  time of the last admin write (when known)
+#   Cache-Control  public, max-age / stale-while-revalidate / stale-if-error from settings
+#
+# so a reverse proxy (nginx, Varnish) or the client can cache and revalidate with
+# If-None-Match. Bodies for hot flags are serialized once and reused until the version changes.
+
+import json
+
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import http_date, parse_etags
+
+MAX_PRESERIALIZED = 10_000       # hot (flag, format) bodies kept per process
+
+_bodies = {}                     # (redis_key, as_json) → (state, body, etag, content_type)
+_cache_control = None
+
+
+def cache_control():
+    global _cache_control
+
+    if _cache_control is None:
+        _cache_control = (
+            f"public, max-age={settings.FLAG_STATUS_MAX_AGE}, "
+            f"stale-while-revalidate={settings.FLAG_STATUS_STALE_WHILE_REVALIDATE}, "
+            f"stale-if-error={settings.FLAG_STATUS_STALE_IF_ERROR}"
+        )
+    return _cache_control
+
+
+def wants_json(request):
+    # ?format=json or an Accept header asking for JSON → structured response, otherwise legacy text
+    return (
+        request.GET.get("format") == "json"
+        or "application/json" in request.META.get("HTTP_ACCEPT", "")
+    )
+
+
+def _render(feature_name, namespace, found, is_active, version, as_json):
+    if as_json:
+        body = json.dumps({
+            "feature": feature_name,
+            "namespace": namespace,
+            "found": found,
+            "active": is_active,
+            "version": version,
+        }).encode("utf-8")
+        return body, "application/json"
+
+    if not found:
+        body = f"Feature '{feature_name}' not found, active: False"
+    else:
+        body = f"Feature '{feature_name}' active: {is_active}"
+    return body.encode("utf-8"), "text/html; charset=utf-8"
+
+
+def _matches(request, etag):
+    header = request.META.get("HTTP_IF_NONE_MATCH")
+    if not header:
+        return False
+
+    # weak comparison: proxies that compress on the fly turn "x" into W/"x"
+    candidates = parse_etags(header)
+    return "*" in candidates or any(
+        candidate.removeprefix("W/") == etag for candidate in candidates
+    )
+
+
+def flag_status_response(request, feature_name, namespace, redis_key, found, is_active, version, modified_at):
+    """Cacheable response for a flag read from Redis; 304 if the client already has it."""
+    as_json = wants_json(request)
+    state = (version, found, is_active)
+
+    entry = _bodies.get((redis_key, as_json))
+    if entry is None or entry[0] != state:
+        body, content_type = _render(feature_name, namespace, found, is_active, version, as_json)
+        flag_state = "n" if not found else ("1" if is_active else "0")
+        etag = f'"{version}-{flag_state}-{"j" if as_json else "t"}"'
+
+        entry = (state, body, etag, content_type)
+        if len(_bodies) >= MAX_PRESERIALIZED:
+            _bodies.clear()
+        _bodies[(redis_key, as_json)] = entry
+
+    _, body, etag, content_type = entry
+
+    if _matches(request, etag):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(body, content_type=content_type)
+
+    response["ETag"] = etag
+    response["Cache-Control"] = cache_control()
+    response["Vary"] = "Accept"
+    if modified_at:
+        response["Last-Modified"] = http_date(modified_at)
+
+    return response
+
+
+def fallback_response(request, feature_name, namespace, found, is_active):
+    """
+    Response served from the local cache / snapshot while Redis is down: never cached downstream.
+
+    found is False when neither knows the flag, rendered like a miss with Redis up.
+    """
+    as_json = wants_json(request)
+    body, content_type = _render(feature_name, namespace, found, is_active, None, as_json)
+
+    response = HttpResponse(body, content_type=content_type)
+    response["Cache-Control"] = "no-store"
+    response["Vary"] = "Accept"
+    response["X-Feature-Source"] = "local_cache"
+    return response
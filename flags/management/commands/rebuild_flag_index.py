@@ -0,0 +1,21 @@
+from django.core.management.base import BaseCommand, CommandError
+from redis.exceptions import RedisError
+
+from flags import namespaces
+
+
+class Command(BaseCommand):
+    help = "Rebuild the per-namespace flag indexes from the Redis keyspace (one SCAN)."
+
+    def handle(self, *args, **options):
+        try:
+            counts = namespaces.rebuild_index()
+        except RedisError as exc:
+            raise CommandError(f"Redis unavailable: {exc}")
+
+        if not counts:
+            self.stdout.write("No feature flags found")
+            return
+
+        for namespace, count in sorted(counts.items()):
+            self.stdout.write(f"{namespace}: {count} flags indexed")
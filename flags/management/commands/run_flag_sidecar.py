@@ -0,0 +1,35 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from flags.sidecar import FlagStore, SidecarServer, start_sync
+
+
+class Command(BaseCommand):
+    help = "Serve flag lookups from memory over a Unix domain socket for colocated services."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--socket",
+            default=settings.FLAG_SIDECAR_SOCKET,
+            help="Unix socket path (default: FLAG_SIDECAR_SOCKET)",
+        )
+        parser.add_argument(
+            "--resync-interval",
+            type=int,
+            default=settings.FLAG_SIDECAR_RESYNC_INTERVAL,
+            help="Seconds between full reloads from Redis, 0 to rely on pub/sub only",
+        )
+
+    def handle(self, *args, **options):
+        store = FlagStore()
+        start_sync(store, options["resync_interval"])       # initial load happens here
+
+        server = SidecarServer(options["socket"], store)
+        self.stdout.write(f"Serving {len(store)} flags on {options['socket']}")
+
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
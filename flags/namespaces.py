@@ -0,0 +1,139 @@
+# per-namespace flag indexes
+
+# flags/namespaces.py
+#
+# Every namespace ("default" or "{environment}/{project}") keeps a Redis set with the names
+# of its flags, and one registry set lists all namespaces:
+#
+#   feature_namespaces            → {"default", "prod/checkout", ...}
+#   feature_index:{namespace}     → {"dark_mode", "new_cart", ...}
+#
+# Flags written before indexes existed are backfilled by one SCAN on first use
+# (or by `manage.py rebuild_flag_index`).
+#
+# Listing a namespace is SMEMBERS + MGET, so it costs time proportional to that namespace
+# instead of a SCAN over the whole keyspace (rate limit counters, other namespaces, ...).
+
+from .redis_client import redis_client
+from . import utils
+from .local_cache import LOCAL_FEATURE_CACHE
+
+NAMESPACE_REGISTRY_KEY = "feature_namespaces"
+INDEX_BUILT_KEY = "feature_index_built"        # set once the keyspace has been backfilled
+MGET_BATCH_SIZE = 1000
+SCAN_BATCH_SIZE = 1000
+
+_index_checked = False
+
+
+def index_key(namespace):
+    return utils.redis_key_generator("feature_index", namespace)
+
+
+def index_feature(namespace, feature_name, pipe=None):
+    # pass a pipeline to index in the same round trip as the write
+    client = pipe if pipe is not None else redis_client
+    client.sadd(index_key(namespace), feature_name)
+    client.sadd(NAMESPACE_REGISTRY_KEY, namespace)
+
+
+def all_namespaces():
+    ensure_index()
+    namespaces = redis_client.smembers(NAMESPACE_REGISTRY_KEY)
+    namespaces.add(utils.DEFAULT_NAMESPACE)
+    return sorted(namespaces)
+
+
+def namespace_features(namespace):
+    ensure_index()
+    return sorted(redis_client.smembers(index_key(namespace)))
+
+
+def namespace_flag_values(namespace):
+    """
+    Yield (feature_name, redis_key, raw_value) for every flag in a namespace.
+
+    raw_value is None if the index still lists a flag whose key is gone.
+    """
+    feature_names = namespace_features(namespace)
+
+    for start in range(0, len(feature_names), MGET_BATCH_SIZE):
+        batch = feature_names[start:start + MGET_BATCH_SIZE]
+        keys = [utils.redis_key_generator("feature", name, namespace) for name in batch]
+        values = redis_client.mget(keys)
+
+        yield from zip(batch, keys, values)
+
+
+def invalidate_namespace_cache(namespace, feature_names=None):
+    # drop one namespace from LOCAL_FEATURE_CACHE without walking other namespaces
+    # (pass feature_names when the caller already has the index, saves the SMEMBERS)
+    if feature_names is None:
+        feature_names = namespace_features(namespace)
+
+    for feature_name in feature_names:
+        LOCAL_FEATURE_CACHE.pop(utils.redis_key_generator("feature", feature_name, namespace), None)
+
+
+def rebuild_index():
+    """
+    Rebuild every namespace index from the keyspace.
+
+    This is the only place that SCANs; it backfills flags created before indexes existed.
+    Returns {namespace: number_of_flags}.
+    """
+    counts = {}
+    cursor = 0
+    while True:
+        cursor, keys = redis_client.scan(
+            cursor=cursor,
+            match="*feature:*",
+            count=SCAN_BATCH_SIZE
+        )
+
+        pipe = redis_client.pipeline(transaction=False)
+        for key in keys:
+            parsed = _parse_feature_key(key)
+            if parsed is None:
+                continue
+
+            namespace, feature_name = parsed
+            index_feature(namespace, feature_name, pipe)
+            counts[namespace] = counts.get(namespace, 0) + 1
+        pipe.execute()
+
+        if cursor == 0:
+            break
+
+    redis_client.sadd(NAMESPACE_REGISTRY_KEY, utils.DEFAULT_NAMESPACE)
+    redis_client.set(INDEX_BUILT_KEY, "1")
+    return counts
+
+
+def ensure_index():
+    # first use against a Redis that predates namespaces → backfill once
+    global _index_checked
+
+    if _index_checked:
+        return
+
+    if not redis_client.exists(INDEX_BUILT_KEY):
+        rebuild_index()
+
+    _index_checked = True
+
+
+def _parse_feature_key(key):
+    # "feature:{name}" → default namespace, "{env}/{project}:feature:{name}" → that namespace
+    prefix, sep, rest = key.partition(":")
+    if not sep:
+        return None
+
+    if prefix == "feature":
+        return utils.DEFAULT_NAMESPACE, rest
+
+    domain, sep, feature_name = rest.partition(":")
+    if not sep or domain != "feature" or "/" not in prefix:
+        return None
+
+    return prefix, feature_name
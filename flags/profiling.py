@@ -0,0 +1,138 @@
+# on-demand sampling profiler
+
+# flags/profiling.py
+#
+# Samples the stacks of every other thread in this worker (sys._current_frames) at a fixed
+# interval and counts them in collapsed format, one line per distinct stack:
+#
+#   flags.views.is_feature_active;flags.versioning.read_with_version;redis.client.Redis.execute_command 37
+#
+# which flamegraph.pl, speedscope or inferno turn into a flame graph. Nothing runs until a
+# profile is requested (admin endpoint or SIGUSR2), and only one profile runs at a time.
+# Sampling always runs in its own background thread, so it sees the threads serving
+# requests (including the only one of a sync worker) and never blocks a request.
+
+import os
+import signal
+import sys
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+
+MAX_PROFILE_SECONDS = 60
+MIN_INTERVAL = 0.001
+
+_profile_lock = threading.Lock()
+_last_profile = None
+
+
+class ProfilerBusy(Exception):
+    pass
+
+
+def _frame_name(frame):
+    code = frame.f_code
+    return f"{frame.f_globals.get('__name__', '?')}.{code.co_qualname}"
+
+
+def _sample(seconds, interval):
+    own_thread = threading.get_ident()
+    stacks = Counter()
+    deadline = time.monotonic() + seconds
+
+    while time.monotonic() < deadline:
+        for thread_id, frame in sys._current_frames().items():
+            if thread_id == own_thread:
+                continue
+
+            names = []
+            while frame is not None:
+                names.append(_frame_name(frame))
+                frame = frame.f_back
+            names.reverse()
+            stacks[";".join(names)] += 1
+
+        time.sleep(interval)
+
+    return stacks
+
+
+def collapsed(stacks):
+    return "".join(f"{stack} {count}\n" for stack, count in stacks.most_common())
+
+
+def _write_profile(text):
+    directory = getattr(settings, "FLAG_PROFILE_DIR", None) or "."
+    path = os.path.join(directory, f"flag-profile-{os.getpid()}-{int(time.time())}.collapsed")
+    with open(path, "w") as f:
+        f.write(text)
+
+
+def _run_profile(seconds, interval, to_file):
+    global _last_profile
+
+    try:
+        text = collapsed(_sample(seconds, interval))
+        _last_profile = (time.time(), text)
+        if to_file:
+            _write_profile(text)
+    finally:
+        _profile_lock.release()
+
+
+def start_profile(seconds, interval=0.005, to_file=False):
+    """
+    Sample every thread of this worker for `seconds` from a background thread and return at once.
+
+    The result is kept for last_profile() and, with to_file, written to FLAG_PROFILE_DIR.
+    Raises ProfilerBusy if a profile is already running in this process.
+    """
+    if not _profile_lock.acquire(blocking=False):
+        raise ProfilerBusy("A profile is already running in this worker")
+
+    seconds = min(seconds, MAX_PROFILE_SECONDS)
+    interval = max(interval, MIN_INTERVAL)
+
+    try:
+        threading.Thread(
+            target=_run_profile,
+            args=(seconds, interval, to_file),
+            name="flag-profiler",
+            daemon=True,
+        ).start()
+    except BaseException:
+        _profile_lock.release()
+        raise
+
+    return seconds
+
+
+def is_running():
+    return _profile_lock.locked()
+
+
+def last_profile():
+    """(finished_at, collapsed stacks) of the last completed background profile, or None."""
+    return _last_profile
+
+
+def _on_signal(signum, frame):
+    # never block the signal handler: sample from a background thread
+    try:
+        start_profile(getattr(settings, "FLAG_PROFILE_SIGNAL_SECONDS", 10), to_file=True)
+    except ProfilerBusy:
+        pass
+
+
+def install_signal_handler(signum=getattr(signal, "SIGUSR2", None)):
+    """`kill -USR2 <worker pid>` writes a collapsed-stack profile to FLAG_PROFILE_DIR."""
+    if signum is None:
+        return
+
+    try:
+        signal.signal(signum, _on_signal)
+    except ValueError:
+        # not the main thread (some servers import the app elsewhere) → endpoint only
+        pass
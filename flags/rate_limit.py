@@ -1,6 +1,7 @@
 from functools import wraps
 from django.http import JsonResponse
 from .redis_client import redis_client
+from . import tracing
 
 RATE_LIMIT = 30          # Max requests
 RATE_LIMIT_WINDOW = 60   # Time window in seconds
@@ -16,11 +17,12 @@ def admin_rate_limit(view_func):
         redis_key = f"rate_limit:admin:{admin.id}"         # Unique key for each admin     
 
         try:
-            current_requests = redis_client.incr(redis_key)       # Increment the request count
+            with tracing.stage("rate_limit"):
+                current_requests = redis_client.incr(redis_key)       # Increment the request count
 
-            # If this is the first request, set TTL
-            if current_requests == 1: 
-                redis_client.expire(redis_key, RATE_LIMIT_WINDOW)      
+                # If this is the first request, set TTL
+                if current_requests == 1: 
+                    redis_client.expire(redis_key, RATE_LIMIT_WINDOW)      
 
             if current_requests > RATE_LIMIT:                   
                 return JsonResponse(
@@ -1,14 +1,39 @@
+import threading
+
 import redis
-import os
-from dotenv import load_dotenv
+from django.conf import settings
+
+
+class LazyRedis:
+    """
+    Stands in for the shared redis.Redis client and builds it on first use.
+
+    Importing the app (manage.py commands, worker boot) no longer creates a connection pool.
+    Methods are cached on the proxy after the first lookup, so later calls cost the same
+    as calling the real client.
+    """
+
+    def __init__(self):
+        self._client = None
+        self._lock = threading.Lock()
 
-load_dotenv()
+    def get_client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = redis.Redis(
+                        host=settings.REDIS_HOST,
+                        port=settings.REDIS_PORT,
+                        db=settings.REDIS_DB,
+                        decode_responses=True,  # to get auto string responses instead of bytes
+                    )
+        return self._client
 
+    def __getattr__(self, name):
+        value = getattr(self.get_client(), name)
+        if callable(value):
+            self.__dict__[name] = value
+        return value
 
-redis_client = redis.Redis(
-    host= os.getenv("REDIS_HOST"),
-    port= int(os.getenv("REDIS_PORT")),
-    db = int(os.getenv("REDIS_DB")),
-    decode_responses=True,  # to get auto string responses instead of bytes
-)
 
+redis_client = LazyRedis()
@@ -0,0 +1,242 @@
+# local flag sidecar: in-memory flag set served over a Unix domain socket
+
+# flags/sidecar.py
+#
+# Started with `manage.py run_flag_sidecar`. Colocated services ask it for flag states
+# instead of going through HTTP + the Django stack.
+#
+# Protocol (both directions): 4 byte big-endian payload length, then the payload.
+#   request  : utf-8 queries separated by "\n"; a query is "feature_name" (default namespace)
+#              or "{environment}/{project}\tfeature_name"; an empty payload is zero queries
+#   response : one byte per query, in order: b"1" active, b"0" inactive / missing / deleted
+# A single lookup is a batch of one. The connection stays open for further requests;
+# a frame longer than MAX_FRAME_SIZE closes it.
+#
+# The flag set is loaded from the namespace indexes at start, kept fresh from the
+# CHANGES_CHANNEL pub/sub messages sent by every admin write, and fully reloaded every
+# FLAG_SIDECAR_RESYNC_INTERVAL seconds to cover anything a subscriber could miss.
+
+import os
+import socket
+import socketserver
+import struct
+import threading
+import time
+
+from redis.exceptions import RedisError
+
+from .redis_client import redis_client
+from . import snapshot
+from . import utils
+from . import versioning
+
+FRAME_HEADER = struct.Struct(">I")
+MAX_FRAME_SIZE = 1024 * 1024
+RECONNECT_DELAY = 1
+
+
+class FlagStore:
+    """
+    Every flag's active state, keyed by redis key. Readers never lock: updates swap or set single keys.
+
+    reload() and refresh() are serialized, so a pub/sub update that lands while a full reload is
+    reading Redis is applied after the reload's swap instead of being overwritten by it.
+    """
+
+    def __init__(self):
+        self._flags = {}
+        self._sync_lock = threading.Lock()
+        self.loaded_at = None
+
+    def __len__(self):
+        return len(self._flags)
+
+    def is_active(self, namespace, feature_name):
+        return self._flags.get(utils.redis_key_generator("feature", feature_name, namespace), False)
+
+    def reload(self):
+        # full load from the namespace indexes, falls back to the on-disk snapshot if Redis is down
+        with self._sync_lock:
+            try:
+                self._flags = snapshot.collect_flags()
+            except RedisError:
+                if self.loaded_at is not None:
+                    return
+                snapshot.load_snapshot()
+                self._flags = dict(snapshot.snapshot_items())
+            self.loaded_at = time.time()
+
+    def refresh(self, redis_key):
+        with self._sync_lock:
+            raw_value = redis_client.get(redis_key)
+            if raw_value is None:
+                self._flags.pop(redis_key, None)
+            else:
+                self._flags[redis_key] = utils.feature_state_from_value(raw_value)
+
+
+def parse_query(query):
+    namespace, sep, feature_name = query.partition("\t")
+    if not sep:
+        return utils.DEFAULT_NAMESPACE, query
+    return namespace, feature_name
+
+
+class _LookupHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        store = self.server.store
+
+        while True:
+            header = self.rfile.read(FRAME_HEADER.size)
+            if len(header) < FRAME_HEADER.size:
+                return
+
+            (length,) = FRAME_HEADER.unpack(header)
+            if length > MAX_FRAME_SIZE:
+                return
+
+            payload = self.rfile.read(length)
+            if len(payload) < length:
+                return
+
+            if not payload:
+                answer = b""                                          # zero queries → zero answers
+            else:
+                answer = bytes(
+                    49 if store.is_active(*parse_query(query)) else 48   # b"1" / b"0"
+                    for query in payload.decode("utf-8", errors="replace").split("\n")
+                )
+            self.wfile.write(FRAME_HEADER.pack(len(answer)) + answer)
+
+
+class SidecarServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path, store):
+        self.store = store
+
+        # a stale socket file from a previous run would make bind() fail
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+
+        super().__init__(socket_path, _LookupHandler)
+        os.chmod(socket_path, 0o660)
+
+
+def _subscribe():
+    pubsub = redis_client.pubsub(ignore_subscribe_messages=True)
+    pubsub.subscribe(versioning.CHANGES_CHANNEL)
+    return pubsub
+
+
+def _follow_changes(store, pubsub):
+    # apply single-flag updates published by admin writes; resync after every reconnect
+    while True:
+        try:
+            if pubsub is None:
+                pubsub = _subscribe()
+                store.reload()
+
+            for message in pubsub.listen():
+                store.refresh(message["data"])
+
+        except RedisError:
+            pubsub = None
+            time.sleep(RECONNECT_DELAY)
+
+
+def _resync_periodically(store, interval):
+    while True:
+        time.sleep(interval)
+        try:
+            store.reload()
+        except RedisError:
+            pass
+
+
+def start_sync(store, resync_interval):
+    """
+    Load the flag set and keep it in sync.
+
+    Subscribes before the initial load, so a change published while loading is not missed.
+    """
+    try:
+        pubsub = _subscribe()
+    except RedisError:
+        pubsub = None           # the follower reconnects and reloads once Redis is back
+
+    store.reload()
+
+    threading.Thread(target=_follow_changes, args=(store, pubsub), name="flag-sidecar-changes", daemon=True).start()
+
+    if resync_interval > 0:
+        threading.Thread(
+            target=_resync_periodically,
+            args=(store, resync_interval),
+            name="flag-sidecar-resync",
+            daemon=True,
+        ).start()
+
+
+class SidecarClient:
+    """
+    Client for colocated services.
+
+        client = SidecarClient("/tmp/flag-sidecar.sock")
+        client.is_active("dark_mode")
+        client.are_active(["dark_mode", "new_cart"], namespace="prod/checkout")
+    """
+
+    def __init__(self, socket_path, timeout=1.0):
+        self.socket_path = socket_path
+        self.timeout = timeout
+        self._sock = None
+        self._lock = threading.Lock()
+
+    def is_active(self, feature_name, namespace=None):
+        return self.are_active([feature_name], namespace)[0]
+
+    def are_active(self, feature_names, namespace=None):
+        if not feature_names:
+            return []
+
+        if namespace and namespace != utils.DEFAULT_NAMESPACE:
+            queries = [f"{namespace}\t{name}" for name in feature_names]
+        else:
+            queries = list(feature_names)
+
+        payload = "\n".join(queries).encode("utf-8")
+
+        with self._lock:
+            answer = self._roundtrip(payload)
+
+        return [byte == 49 for byte in answer]
+
+    def close(self):
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+
+    def _roundtrip(self, payload):
+        if self._sock is None:
+            self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._sock.settimeout(self.timeout)
+            self._sock.connect(self.socket_path)
+
+        try:
+            self._sock.sendall(FRAME_HEADER.pack(len(payload)) + payload)
+            (length,) = FRAME_HEADER.unpack(self._recv_exact(FRAME_HEADER.size))
+            return self._recv_exact(length)
+        except OSError:
+            self.close()
+            raise
+
+    def _recv_exact(self, size):
+        chunks = []
+        while size:
+            chunk = self._sock.recv(size)
+            if not chunk:
+                raise ConnectionError("Sidecar closed the connection")
+            chunks.append(chunk)
+            size -= len(chunk)
+        return b"".join(chunks)
@@ -0,0 +1,146 @@
+# request coalescing (single-flight)
+
+# flags/singleflight.py
+#
+# When many requests need the same Redis read at the same time (hot flag after a deploy,
+# dashboard refresh storms on list_all_features), only the first one goes to Redis.
+# The others wait for it and share its result or its exception.
+#
+#   reads = SingleFlight("flag_reads")
+#   value = reads.do(redis_key, lambda: redis_client.get(redis_key), timeout=2)
+#   value = await reads.do_async(redis_key, lambda: async_client.get(redis_key), timeout=2)
+#
+# Only calls that overlap in time are merged, nothing is cached afterwards.
+# Waiters get their own copy of a shared exception (chained to the original), so threads
+# never raise, and append tracebacks to, the same exception object.
+
+import asyncio
+import copy
+import threading
+
+_registry = []
+
+
+class SingleFlightTimeout(Exception):
+    pass
+
+
+def _copy_error(error):
+    try:
+        return copy.copy(error)
+    except Exception:
+        # exceptions that cannot be rebuilt from their args are rare; report them generically
+        return RuntimeError(f"shared call failed: {error!r}")
+
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight:
+    def __init__(self, name):
+        self.name = name
+        self._lock = threading.Lock()
+        self._calls = {}            # key → _Call in flight (threads)
+        self._tasks = {}            # key → asyncio.Task in flight (event loop)
+
+        self.calls = 0              # every do()/do_async()
+        self.executions = 0         # calls that actually ran fn
+        self.coalesced = 0          # calls that waited on someone else's fn
+        self.errors = 0             # executions that raised
+        self.timeouts = 0           # waiters that gave up
+
+        _registry.append(self)
+
+    def do(self, key, fn, timeout=None):
+        """
+        Run fn() once for all threads asking for the same key at the same time.
+
+        The thread that runs fn is not bounded by timeout (the Redis client has its own);
+        waiters raise SingleFlightTimeout if the shared call takes longer than timeout.
+        """
+        with self._lock:
+            self.calls += 1
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executions += 1
+            else:
+                self.coalesced += 1
+
+        if leader:
+            try:
+                call.result = fn()
+            except BaseException as exc:
+                call.error = exc
+                with self._lock:
+                    self.errors += 1
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+
+        elif not call.done.wait(timeout):
+            with self._lock:
+                self.timeouts += 1
+            raise SingleFlightTimeout(f"{self.name}: shared call for {key!r} timed out")
+
+        if call.error is not None:
+            if leader:
+                raise call.error
+            raise _copy_error(call.error) from call.error
+        return call.result
+
+    async def do_async(self, key, coro_fn, timeout=None):
+        """
+        asyncio version of do(): coro_fn() runs once as a task shared by every coroutine
+        awaiting the same key. A caller that times out or is cancelled leaves the task
+        running for the others.
+        """
+        self.calls += 1
+        task = self._tasks.get(key)
+        leader = task is None
+
+        if leader:
+            self.executions += 1
+            task = asyncio.ensure_future(coro_fn())
+            self._tasks[key] = task
+            task.add_done_callback(lambda t: self._finish_task(key, t))
+        else:
+            self.coalesced += 1
+
+        try:
+            return await asyncio.wait_for(asyncio.shield(task), timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise SingleFlightTimeout(f"{self.name}: shared call for {key!r} timed out")
+        except Exception as exc:
+            if leader:
+                raise
+            raise _copy_error(exc) from exc
+
+    def _finish_task(self, key, task):
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        if not task.cancelled() and task.exception() is not None:
+            self.errors += 1
+
+    def stats(self):
+        return {
+            "calls": self.calls,
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "in_flight": len(self._calls) + len(self._tasks),
+        }
+
+
+def all_stats():
+    return {flight.name: flight.stats() for flight in _registry}
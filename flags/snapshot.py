@@ -0,0 +1,305 @@
+# on-disk snapshot of the flag set
+
+# flags/snapshot.py
+#
+# Redis is the source of truth, LOCAL_FEATURE_CACHE is per process and starts empty.
+# A process that boots while Redis is down would fail every flag closed, so we keep a
+# compact copy of all flags on local disk and map it into memory at startup.
+#
+# File layout (little endian):
+#   header  : magic(4s) format_version(H) reserved(H) created_at(d) count(I) crc32(I)
+#   offsets : (count + 1) x uint32, start of each key inside the keys blob
+#   states  : count x uint8, 1 = active / 0 = inactive
+#   keys    : utf-8 redis keys, sorted, concatenated
+#
+# Loading maps the file, checks the header and runs one CRC32 over the body: no parsing and no
+# per-flag objects, so it grows only with file size (well under 1 ms for 100k flags).
+# Lookups binary search the sorted keys straight out of the mapping. The writer thread maps
+# every snapshot it writes, so a long-running worker falls back to the latest one, not boot's.
+
+import bisect
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+
+from django.conf import settings
+from redis.exceptions import RedisError
+
+from . import namespaces
+from . import utils
+
+SNAPSHOT_MAGIC = b"FFSN"
+SNAPSHOT_FORMAT_VERSION = 1
+SNAPSHOT_HEADER = struct.Struct("<4sHHdII")
+
+SNAPSHOT_DEBOUNCE = 1           # seconds to wait after a change before writing (groups bursts of writes)
+LOAD_RETRY_INTERVAL = 5         # seconds between attempts to map a snapshot that was missing
+
+_dirty = threading.Event()
+_writer_thread = None
+_snapshot = None
+_next_load_attempt = 0.0
+
+
+class SnapshotError(Exception):
+    pass
+
+
+class _SortedKeys:
+    # sequence view over the keys blob so bisect can search it without building a list
+    def __init__(self, offsets, buffer, base):
+        self._offsets = offsets
+        self._buffer = buffer
+        self._base = base
+
+    def __len__(self):
+        return len(self._offsets) - 1
+
+    def __getitem__(self, index):
+        return self._buffer[self._base + self._offsets[index]:self._base + self._offsets[index + 1]]
+
+
+class FlagSnapshot:
+    """Read-only view over a snapshot file mapped into memory."""
+
+    def __init__(self, buffer, created_at, count):
+        self.created_at = created_at
+        self._buffer = buffer
+
+        view = memoryview(buffer)
+        offsets_start = SNAPSHOT_HEADER.size
+        states_start = offsets_start + (count + 1) * 4
+        keys_start = states_start + count
+
+        self._offsets = view[offsets_start:states_start].cast("I")
+        self._states = view[states_start:keys_start]
+        self._keys = _SortedKeys(self._offsets, buffer, keys_start)
+
+    def __len__(self):
+        return len(self._keys)
+
+    def get(self, redis_key, default=None):
+        key = redis_key.encode("utf-8")
+        index = bisect.bisect_left(self._keys, key)
+
+        if index < len(self._keys) and self._keys[index] == key:
+            return self._states[index] == 1
+        return default
+
+    def items(self, prefix=""):
+        # keys are sorted, so one namespace is a contiguous range starting at its prefix
+        encoded_prefix = prefix.encode("utf-8")
+        index = bisect.bisect_left(self._keys, encoded_prefix)
+
+        while index < len(self._keys):
+            key = self._keys[index]
+            if not key.startswith(encoded_prefix):
+                break
+            yield key.decode("utf-8"), self._states[index] == 1
+            index += 1
+
+
+def snapshot_path():
+    return getattr(settings, "FLAG_SNAPSHOT_PATH", None)
+
+
+def write_snapshot(flags, path=None):
+    """
+    Atomically write {redis_key: is_active} to disk.
+
+    Written to a temp file first and renamed, so readers never see a half written snapshot.
+    """
+    path = path or snapshot_path()
+    if not path:
+        return
+
+    encoded = sorted((key.encode("utf-8"), is_active) for key, is_active in flags.items())
+
+    offsets = [0]
+    for key, _ in encoded:
+        offsets.append(offsets[-1] + len(key))
+
+    body = b"".join((
+        struct.pack(f"<{len(offsets)}I", *offsets),
+        bytes(1 if is_active else 0 for _, is_active in encoded),
+        b"".join(key for key, _ in encoded),
+    ))
+
+    header = SNAPSHOT_HEADER.pack(
+        SNAPSHOT_MAGIC,
+        SNAPSHOT_FORMAT_VERSION,
+        0,
+        time.time(),
+        len(encoded),
+        zlib.crc32(body),
+    )
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(header)
+        f.write(body)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def read_snapshot(path=None):
+    """
+    Map a snapshot file into memory and return it as a FlagSnapshot.
+
+    Raises SnapshotError if the file is not a snapshot we understand or is corrupted.
+    """
+    path = path or snapshot_path()
+
+    with open(path, "rb") as f:
+        try:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            raise SnapshotError("Snapshot file is empty")
+
+    if len(buffer) < SNAPSHOT_HEADER.size:
+        raise SnapshotError("Snapshot file is truncated")
+
+    magic, format_version, _, created_at, count, checksum = SNAPSHOT_HEADER.unpack_from(buffer)
+
+    if magic != SNAPSHOT_MAGIC:
+        raise SnapshotError("Not a flag snapshot file")
+
+    if format_version != SNAPSHOT_FORMAT_VERSION:
+        raise SnapshotError(f"Unsupported snapshot version: {format_version}")
+
+    if len(buffer) < SNAPSHOT_HEADER.size + (count + 1) * 4 + count:
+        raise SnapshotError("Snapshot file is truncated")
+
+    if zlib.crc32(memoryview(buffer)[SNAPSHOT_HEADER.size:]) != checksum:
+        raise SnapshotError("Snapshot checksum mismatch")
+
+    return FlagSnapshot(buffer, created_at, count)
+
+
+def load_snapshot(path=None):
+    """
+    Make the on-disk snapshot the fallback for flags missing from LOCAL_FEATURE_CACHE.
+
+    Returns the number of flags in the snapshot (0 if there is no usable snapshot).
+    """
+    global _snapshot, _next_load_attempt
+
+    path = path or snapshot_path()
+    if not path:
+        return 0
+
+    _next_load_attempt = time.monotonic() + LOAD_RETRY_INTERVAL
+    try:
+        _snapshot = read_snapshot(path)
+    except (OSError, SnapshotError):
+        # missing or unreadable snapshot must never stop the service from starting
+        return 0
+
+    return len(_snapshot)
+
+
+def lookup(redis_key, default=False):
+    """Last known state of a flag from the snapshot, used when Redis is unavailable."""
+    if _snapshot is None:
+        # boot did not find a snapshot, a writer may have produced one since
+        # (retried at most every LOAD_RETRY_INTERVAL, not on every request of an outage)
+        if time.monotonic() < _next_load_attempt:
+            return default
+
+        load_snapshot()
+        if _snapshot is None:
+            return default
+
+    return _snapshot.get(redis_key, default)
+
+
+def snapshot_items(prefix=""):
+    if _snapshot is None:
+        return iter(())
+    return _snapshot.items(prefix)
+
+
+def collect_flags():
+    """
+    Read every feature flag from Redis as {redis_key: is_active}.
+
+    Walks the namespace indexes with batched MGETs, so the cost follows the number of flags
+    rather than the size of the whole keyspace.
+    """
+    flags = {}
+    for namespace in namespaces.all_namespaces():
+        for _, redis_key, raw_value in namespaces.namespace_flag_values(namespace):
+            if raw_value is not None:
+                flags[redis_key] = utils.feature_state_from_value(raw_value)
+
+    return flags
+
+
+def mark_dirty():
+    # called by the admin views after a successful write
+    _dirty.set()
+
+
+def refresh_snapshot(path=None):
+    """
+    Write a fresh snapshot from Redis and map it in place of the one loaded at boot.
+
+    Raises RedisError / OSError; the snapshot in use stays untouched in that case.
+    """
+    path = path or snapshot_path()
+    write_snapshot(collect_flags(), path)
+    return load_snapshot(path)
+
+
+def _writer_loop(interval):
+    while True:
+        if _dirty.wait(interval):
+            time.sleep(SNAPSHOT_DEBOUNCE)
+        _dirty.clear()
+
+        try:
+            refresh_snapshot()
+        except (RedisError, OSError):
+            # Redis down or disk full → keep the last good snapshot
+            pass
+
+
+def start_snapshot_writer():
+    """
+    Start the background thread that refreshes the snapshot every FLAG_SNAPSHOT_INTERVAL
+    seconds and shortly after every flag change. Safe to call more than once.
+    """
+    global _writer_thread
+
+    interval = getattr(settings, "FLAG_SNAPSHOT_INTERVAL", 0)
+    if not snapshot_path() or interval <= 0:
+        return
+
+    if _writer_thread is not None:
+        return
+
+    _writer_thread = threading.Thread(
+        target=_writer_loop,
+        args=(interval,),
+        name="flag-snapshot-writer",
+        daemon=True,
+    )
+    _writer_thread.start()
+
+
+def _restart_writer_after_fork():
+    # a forked worker (gunicorn --preload) inherits _writer_thread but not the thread itself
+    global _writer_thread, _dirty
+
+    _dirty = threading.Event()
+    if _writer_thread is not None:
+        _writer_thread = None
+        start_snapshot_writer()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_restart_writer_after_fork)
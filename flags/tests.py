@@ -1,3 +1,732 @@
-from django.test import TestCase
+import asyncio
+import json
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import time
+from unittest import mock
 
-# Create your tests here.
+import fakeredis
+from django.conf import settings
+from django.test import Client, SimpleTestCase, TestCase
+from django.utils.http import http_date
+from redis.exceptions import RedisError
+
+import flags.redis_client
+from audit.models import AdminUser, AuditLog
+from flags import analytics
+from flags import http_cache
+from flags import namespaces
+from flags import profiling
+from flags import sidecar
+from flags import snapshot
+from flags.local_cache import LOCAL_FEATURE_CACHE
+from flags.singleflight import SingleFlight, SingleFlightTimeout
+
+
+class FakeRedisMixin:
+    # point the shared lazy client at an in-memory Redis for the duration of a test
+    def setUp(self):
+        super().setUp()
+        proxy = flags.redis_client.redis_client
+        self._proxy_state = dict(proxy.__dict__)
+
+        self.redis_server = fakeredis.FakeServer()       # .connected = False simulates an outage
+        self.redis = fakeredis.FakeRedis(server=self.redis_server, decode_responses=True)
+        proxy.__dict__.clear()                      # drop the bound methods cached from the real client
+        proxy.__dict__.update(_client=self.redis, _lock=self._proxy_state["_lock"])
+        namespaces._index_checked = False
+
+    def tearDown(self):
+        proxy = flags.redis_client.redis_client
+        proxy.__dict__.clear()
+        proxy.__dict__.update(self._proxy_state)
+        namespaces._index_checked = False
+        super().tearDown()
+
+
+class SnapshotTests(FakeRedisMixin, SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.mkdtemp()
+        self.path = os.path.join(self.directory, "flag_snapshot.bin")
+        self._loaded = snapshot._snapshot
+        snapshot._snapshot = None
+        snapshot._next_load_attempt = 0.0
+
+    def tearDown(self):
+        snapshot._snapshot = self._loaded
+        shutil.rmtree(self.directory)
+        super().tearDown()
+
+    def test_round_trip(self):
+        flags = {"feature:a": True, "feature:b": False, "prod/shop:feature:c": True}
+        snapshot.write_snapshot(flags, self.path)
+
+        loaded = snapshot.read_snapshot(self.path)
+        self.assertEqual(len(loaded), 3)
+        self.assertIs(loaded.get("feature:a"), True)
+        self.assertIs(loaded.get("feature:b"), False)
+        self.assertIsNone(loaded.get("feature:missing"))
+        self.assertEqual(dict(loaded.items("prod/shop:feature:")), {"prod/shop:feature:c": True})
+
+    def test_empty_flag_set_round_trips(self):
+        snapshot.write_snapshot({}, self.path)
+        self.assertEqual(len(snapshot.read_snapshot(self.path)), 0)
+
+    def test_truncated_file_is_rejected(self):
+        snapshot.write_snapshot({"feature:a": True, "feature:b": False}, self.path)
+        with open(self.path, "rb") as f:
+            data = f.read()
+
+        for size in (0, snapshot.SNAPSHOT_HEADER.size - 1, len(data) - 1):
+            with open(self.path, "wb") as f:
+                f.write(data[:size])
+            with self.assertRaises(snapshot.SnapshotError):
+                snapshot.read_snapshot(self.path)
+
+    def test_checksum_mismatch_is_rejected(self):
+        snapshot.write_snapshot({"feature:a": True}, self.path)
+        with open(self.path, "r+b") as f:
+            f.seek(-1, os.SEEK_END)
+            last = f.read(1)
+            f.seek(-1, os.SEEK_END)
+            f.write(bytes([last[0] ^ 0xFF]))
+
+        with self.assertRaisesMessage(snapshot.SnapshotError, "checksum"):
+            snapshot.read_snapshot(self.path)
+
+    def test_load_keeps_last_good_snapshot_on_corrupt_file(self):
+        snapshot.write_snapshot({"feature:a": True}, self.path)
+        self.assertEqual(snapshot.load_snapshot(self.path), 1)
+
+        corrupt_path = os.path.join(self.directory, "corrupt.bin")
+        with open(corrupt_path, "wb") as f:
+            f.write(b"garbage")
+        self.assertEqual(snapshot.load_snapshot(corrupt_path), 0)
+        self.assertTrue(snapshot.lookup("feature:a"))
+
+    def test_refresh_maps_the_new_file(self):
+        self.redis.set("feature:z", "0")
+        snapshot.refresh_snapshot(self.path)
+        self.assertFalse(snapshot.lookup("feature:z", None))
+
+        self.redis.set("feature:z", "1")
+        snapshot.refresh_snapshot(self.path)
+        self.assertTrue(snapshot.lookup("feature:z", None))
+
+    def test_missing_snapshot_retry_is_rate_limited(self):
+        with self.settings(FLAG_SNAPSHOT_PATH=self.path):
+            self.assertFalse(snapshot.lookup("feature:a"))
+
+            # appears right after the failed attempt → not picked up until the retry interval passes
+            snapshot.write_snapshot({"feature:a": True}, self.path)
+            self.assertFalse(snapshot.lookup("feature:a"))
+
+            snapshot._next_load_attempt = 0.0
+            self.assertTrue(snapshot.lookup("feature:a"))
+
+
+class ParseFeatureKeyTests(SimpleTestCase):
+    def test_default_namespace(self):
+        self.assertEqual(namespaces._parse_feature_key("feature:dark_mode"), ("default", "dark_mode"))
+
+    def test_namespaced_key(self):
+        self.assertEqual(
+            namespaces._parse_feature_key("prod/checkout:feature:new_cart"),
+            ("prod/checkout", "new_cart"),
+        )
+
+    def test_other_keys_are_ignored(self):
+        for key in (
+            "feature_index:prod/checkout",
+            "feature_version:feature:dark_mode",
+            "flag_stats:feature:dark_mode",
+            "rate_limit:feature:x",             # prefix without "/" is not a namespace
+            "prod/checkout:flag_stats:x",
+            "feature",
+        ):
+            with self.subTest(key=key):
+                self.assertIsNone(namespaces._parse_feature_key(key))
+
+
+class NamespaceCacheTests(FakeRedisMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        AdminUser.objects.create(name="admin", api_key="test-key", scopes=["read", "write"])
+        self.client = Client(HTTP_X_ADMIN_KEY="test-key")
+
+    def tearDown(self):
+        LOCAL_FEATURE_CACHE.clear()
+        super().tearDown()
+
+    def test_listing_drops_flags_gone_from_redis(self):
+        self.client.post("/flags/ns/prod/shop/feature/initialize/kept/", "{}", content_type="application/json")
+        self.client.post("/flags/ns/prod/shop/feature/initialize/gone/", "{}", content_type="application/json")
+        self.client.post("/flags/feature/initialize/other/", "{}", content_type="application/json")
+        self.redis.delete("prod/shop:feature:gone")
+
+        response = self.client.get("/flags/ns/prod/shop/feature/list/")
+
+        self.assertEqual(response.json()["features"], {"kept": {"enabled": False}})
+        self.assertIn("prod/shop:feature:kept", LOCAL_FEATURE_CACHE)
+        self.assertNotIn("prod/shop:feature:gone", LOCAL_FEATURE_CACHE)
+        self.assertIn("feature:other", LOCAL_FEATURE_CACHE)
+
+    def test_admin_write_is_audited_with_namespace(self):
+        self.client.post("/flags/ns/prod/shop/feature/initialize/audited/", "{}", content_type="application/json")
+
+        entry = AuditLog.objects.get()
+        self.assertEqual((entry.action, entry.feature_name, entry.namespace), ("CREATE", "audited", "prod/shop"))
+        self.assertEqual(entry.performed_by_id, AdminUser.objects.get().id)
+
+
+class AnalyticsTests(FakeRedisMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        analytics._reset()
+        AdminUser.objects.create(name="admin", api_key="test-key", scopes=["read"])
+
+    def tearDown(self):
+        analytics._reset()
+        LOCAL_FEATURE_CACHE.clear()
+        super().tearDown()
+
+    def test_misses_are_not_recorded(self):
+        for i in range(50):
+            self.client.get(f"/flags/feature/status/missing_{i}/")
+
+        self.assertFalse(any(table.counts for table in analytics._tables))
+        self.assertEqual(analytics.flush(), 0)
+        self.assertEqual(self.redis.keys("flag_*"), [])
+
+    def test_existing_flag_is_counted_and_flushed(self):
+        self.redis.set("feature:dark_mode", "1")
+        self.client.get("/flags/feature/status/dark_mode/", HTTP_X_CLIENT_ID="a")
+        self.client.get("/flags/feature/status/dark_mode/", HTTP_X_CLIENT_ID="b")
+
+        self.assertEqual(analytics.flush(), 1)
+        stats = self.redis.hgetall("flag_stats:feature:dark_mode")
+        self.assertEqual((stats["evaluations"], stats["true"]), ("2", "2"))
+        self.assertEqual(self.redis.pfcount("flag_callers:feature:dark_mode"), 2)
+        self.assertEqual(analytics.flush(), 0)
+
+    def test_failed_flush_keeps_counts(self):
+        analytics.record("feature:dark_mode", True)
+        self.redis_server.connected = False
+        with self.assertRaises(RedisError):
+            analytics.flush()
+
+        self.redis_server.connected = True
+        analytics.record("feature:dark_mode", True)
+        analytics.flush()
+        self.assertEqual(self.redis.hget("flag_stats:feature:dark_mode", "evaluations"), "2")
+
+    def test_threads_count_into_their_own_tables(self):
+        def evaluate():
+            for _ in range(1000):
+                analytics.record("feature:dark_mode", True)
+
+        threads = [threading.Thread(target=evaluate) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(analytics._tables), 8)
+        analytics.flush()
+        self.assertEqual(self.redis.hget("flag_stats:feature:dark_mode", "evaluations"), "8000")
+        self.assertEqual(analytics._tables, [])            # finished threads are dropped once flushed
+
+    def test_forked_child_starts_clean_with_its_own_flusher(self):
+        analytics.record("feature:dark_mode", True)
+        parent_thread = threading.Thread(target=lambda: None)
+        self.addCleanup(setattr, analytics, "_flusher_thread", analytics._flusher_thread)
+        analytics._flusher_thread = parent_thread
+
+        loop = mock.Mock()
+        with self.settings(FLAG_ANALYTICS_FLUSH_INTERVAL=3600), mock.patch.object(analytics, "_flusher_loop", loop):
+            analytics._restart_flusher_after_fork()
+            analytics._flusher_thread.join()
+
+        self.assertIsNot(analytics._flusher_thread, parent_thread)
+        loop.assert_called_once_with(3600)
+        self.assertEqual(analytics.flush(), 0)              # the parent's counts are the parent's to flush
+
+    def test_flag_usage_splits_never_stale_active(self):
+        for name in ("never", "stale", "active"):
+            self.redis.set(f"feature:{name}", "1")
+            namespaces.index_feature("default", name)
+        self.redis.hset("flag_stats:feature:stale", mapping={"evaluations": 1, "last_evaluated": 1})
+        analytics.record("feature:active", True)
+        analytics.flush()
+
+        usage = analytics.flag_usage("default", stale_after=3600)
+        self.assertEqual([entry["feature"] for entry in usage["never_evaluated"]], ["never"])
+        self.assertEqual([entry["feature"] for entry in usage["stale"]], ["stale"])
+        self.assertEqual([entry["feature"] for entry in usage["active"]], ["active"])
+
+    def test_stale_report_rejects_bad_days(self):
+        for days in ("inf", "nan", "-1", "abc"):
+            with self.subTest(days=days):
+                response = self.client.get("/flags/feature/stale/", {"days": days}, HTTP_X_ADMIN_KEY="test-key")
+                self.assertEqual(response.status_code, 400)
+
+        response = self.client.get("/flags/feature/stale/", {"days": "0"}, HTTP_X_ADMIN_KEY="test-key")
+        self.assertEqual(response.status_code, 200)
+
+
+class StatusValueTests(FakeRedisMixin, TestCase):
+    def tearDown(self):
+        LOCAL_FEATURE_CACHE.clear()
+        super().tearDown()
+
+    def test_unreadable_values_fail_closed(self):
+        for raw_value in ("[1]", '"on"', "null", "{broken", '{"enabled": true, "deleted": true}'):
+            with self.subTest(raw_value=raw_value):
+                self.redis.set("feature:odd", raw_value)
+                response = self.client.get("/flags/feature/status/odd/", {"format": "json"})
+                self.assertEqual(response.status_code, 200)
+                self.assertIs(response.json()["active"], False)
+
+    def test_corrupted_value_leaves_cached_state_untouched(self):
+        LOCAL_FEATURE_CACHE["feature:odd"] = True
+        self.redis.set("feature:odd", "{broken")
+
+        self.client.get("/flags/feature/status/odd/")
+        self.assertIs(LOCAL_FEATURE_CACHE["feature:odd"], True)
+
+        self.redis.set("feature:odd", '{"enabled": false}')
+        self.client.get("/flags/feature/status/odd/")
+        self.assertIs(LOCAL_FEATURE_CACHE["feature:odd"], False)
+
+
+class SidecarTests(FakeRedisMixin, SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.mkdtemp()
+        self.socket_path = os.path.join(self.directory, "sidecar.sock")
+
+        self.store = sidecar.FlagStore()
+        self.store._flags = {
+            "feature:dark_mode": True,
+            "feature:new_cart": False,
+            "prod/checkout:feature:new_cart": True,
+        }
+        self.server = sidecar.SidecarServer(self.socket_path, self.store)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.client = sidecar.SidecarClient(self.socket_path)
+
+    def tearDown(self):
+        self.client.close()
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.directory)
+        super().tearDown()
+
+    def _raw_socket(self):
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(1)
+        sock.connect(self.socket_path)
+        self.addCleanup(sock.close)
+        return sock
+
+    def test_single_and_batch(self):
+        self.assertTrue(self.client.is_active("dark_mode"))
+        self.assertEqual(
+            self.client.are_active(["dark_mode", "new_cart", "missing"]),
+            [True, False, False],
+        )
+
+    def test_namespaced_query(self):
+        self.assertTrue(self.client.is_active("new_cart", namespace="prod/checkout"))
+        self.assertFalse(self.client.is_active("dark_mode", namespace="prod/checkout"))
+        self.assertFalse(self.client.is_active("new_cart", namespace="default"))
+
+    def test_empty_payload_gets_empty_answer(self):
+        sock = self._raw_socket()
+        sock.sendall(sidecar.FRAME_HEADER.pack(0))
+        self.assertEqual(sock.recv(16), sidecar.FRAME_HEADER.pack(0))
+
+        # connection still usable afterwards
+        sock.sendall(sidecar.FRAME_HEADER.pack(9) + b"dark_mode")
+        self.assertEqual(sock.recv(16), sidecar.FRAME_HEADER.pack(1) + b"1")
+
+    def test_oversize_frame_closes_connection(self):
+        sock = self._raw_socket()
+        sock.sendall(sidecar.FRAME_HEADER.pack(sidecar.MAX_FRAME_SIZE + 1))
+        self.assertEqual(sock.recv(16), b"")
+
+    def test_refresh_during_reload_is_kept(self):
+        self.redis.set("feature:dark_mode", "1")
+        namespaces.index_feature("default", "dark_mode")
+        collect_flags = snapshot.collect_flags
+        refresher = []
+
+        def slow_collect():
+            flags = collect_flags()
+            # an admin write + its pub/sub refresh land after the reload read Redis
+            self.redis.set("feature:dark_mode", "0")
+            refresher.append(threading.Thread(target=self.store.refresh, args=("feature:dark_mode",)))
+            refresher[0].start()
+            refresher[0].join(0.1)
+            return flags
+
+        with mock.patch.object(snapshot, "collect_flags", slow_collect):
+            self.store.reload()
+        refresher[0].join()
+
+        self.assertFalse(self.store.is_active("default", "dark_mode"))
+
+
+class SingleFlightTests(SimpleTestCase):
+    WAITERS = 8
+
+    def _run_threads(self, flight, fn, timeout=None):
+        results = [None] * self.WAITERS
+
+        def call(index):
+            try:
+                results[index] = flight.do("key", fn, timeout=timeout)
+            except Exception as exc:
+                results[index] = exc
+
+        threads = [threading.Thread(target=call, args=(index,)) for index in range(self.WAITERS)]
+        for thread in threads:
+            thread.start()
+        return threads, results
+
+    def _wait_for_waiters(self, flight):
+        while flight.coalesced < self.WAITERS - 1:
+            time.sleep(0.001)
+
+    def test_concurrent_calls_share_one_execution(self):
+        flight = SingleFlight("test")
+        release = threading.Event()
+        executions = []
+
+        def fn():
+            executions.append(1)
+            release.wait(5)
+            return "value"
+
+        threads, results = self._run_threads(flight, fn)
+        self._wait_for_waiters(flight)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(executions), 1)
+        self.assertEqual(results, ["value"] * self.WAITERS)
+        self.assertEqual(flight.stats()["in_flight"], 0)
+
+    def test_error_reaches_every_caller_as_its_own_exception(self):
+        flight = SingleFlight("test")
+        release = threading.Event()
+        error = RedisError("down")
+
+        def fn():
+            release.wait(5)
+            raise error
+
+        threads, results = self._run_threads(flight, fn)
+        self._wait_for_waiters(flight)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertTrue(all(isinstance(result, RedisError) for result in results))
+        self.assertEqual(len({id(result) for result in results}), self.WAITERS)
+        self.assertEqual(sum(result is error for result in results), 1)                 # the leader's
+        self.assertTrue(all(result.__cause__ is error for result in results if result is not error))
+        self.assertEqual(flight.errors, 1)
+
+    def test_waiter_timeout(self):
+        flight = SingleFlight("test")
+        release = threading.Event()
+
+        threads, results = self._run_threads(flight, lambda: release.wait(5) and "value", timeout=0.01)
+        while flight.timeouts < self.WAITERS - 1:
+            time.sleep(0.001)
+        release.set()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(sum(isinstance(result, SingleFlightTimeout) for result in results), self.WAITERS - 1)
+        self.assertIn("value", results)
+        self.assertEqual(flight.timeouts, self.WAITERS - 1)
+
+
+class AsyncSingleFlightTests(SimpleTestCase):
+    def test_concurrent_calls_share_one_execution(self):
+        flight = SingleFlight("test_async")
+        executions = []
+
+        async def fetch():
+            executions.append(1)
+            await asyncio.sleep(0.01)
+            return "value"
+
+        async def main():
+            return await asyncio.gather(*(flight.do_async("key", fetch) for _ in range(8)))
+
+        self.assertEqual(asyncio.run(main()), ["value"] * 8)
+        self.assertEqual(len(executions), 1)
+        self.assertEqual(flight.coalesced, 7)
+
+    def test_error_reaches_every_caller_as_its_own_exception(self):
+        flight = SingleFlight("test_async")
+        error = RedisError("down")
+
+        async def fetch():
+            await asyncio.sleep(0.01)
+            raise error
+
+        async def main():
+            return await asyncio.gather(
+                *(flight.do_async("key", fetch) for _ in range(8)),
+                return_exceptions=True,
+            )
+
+        results = asyncio.run(main())
+        self.assertTrue(all(isinstance(result, RedisError) for result in results))
+        self.assertEqual(len({id(result) for result in results}), 8)
+        self.assertEqual(flight.errors, 1)
+
+    def test_waiter_timeout_leaves_shared_call_running(self):
+        flight = SingleFlight("test_async")
+
+        async def fetch():
+            await asyncio.sleep(0.05)
+            return "value"
+
+        async def main():
+            leader = asyncio.ensure_future(flight.do_async("key", fetch))
+            await asyncio.sleep(0)
+            with self.assertRaises(SingleFlightTimeout):
+                await flight.do_async("key", fetch, timeout=0.001)
+            return await leader
+
+        self.assertEqual(asyncio.run(main()), "value")
+        self.assertEqual(flight.timeouts, 1)
+
+
+class ProfilingTests(FakeRedisMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        AdminUser.objects.create(name="admin", api_key="test-key", scopes=["debug", "write"])
+        self.client = Client(HTTP_X_ADMIN_KEY="test-key")
+
+    def _wait_for_profile(self):
+        while profiling.is_running():
+            time.sleep(0.005)
+
+    def test_profile_runs_in_background_and_sees_request_thread(self):
+        response = self.client.post("/flags/debug/profile/?seconds=0.2&interval_ms=1")
+        self.assertEqual(response.status_code, 202)
+
+        # the thread that served the POST keeps working while the profiler samples it
+        while profiling.is_running():
+            self.client.get("/flags/feature/status/sampled/")
+        response = self.client.get("/flags/debug/profile/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b"flags.views.is_feature_active", response.content)
+
+    def test_second_profile_is_rejected_while_running(self):
+        self.assertEqual(self.client.post("/flags/debug/profile/?seconds=0.05").status_code, 202)
+        self.assertEqual(self.client.post("/flags/debug/profile/?seconds=0.05").status_code, 409)
+        self._wait_for_profile()
+
+    def test_bad_durations_are_rejected(self):
+        for query in ("seconds=nan", "seconds=0", "seconds=-1", "interval_ms=inf", "seconds=abc"):
+            with self.subTest(query=query):
+                self.assertEqual(self.client.post(f"/flags/debug/profile/?{query}").status_code, 400)
+
+
+class SlowRequestTracingTests(FakeRedisMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        AdminUser.objects.create(name="admin", api_key="test-key", scopes=["write"])
+        self.redis.set("feature:traced", "0")
+
+    def tearDown(self):
+        LOCAL_FEATURE_CACHE.clear()
+        super().tearDown()
+
+    def test_admin_write_reports_every_stage(self):
+        # the middleware is loaded by the test client's first request, so it sees the override
+        with self.settings(FLAG_SLOW_REQUEST_MS=0.000001):
+            with self.assertLogs("flags.slow_requests", "WARNING") as logs:
+                self.client.patch(
+                    "/flags/feature/change-state/traced/",
+                    json.dumps({"enabled": True}),
+                    content_type="application/json",
+                    HTTP_X_ADMIN_KEY="test-key",
+                )
+
+        stages = json.loads(logs.records[0].getMessage().split(" ", 5)[5])
+        self.assertEqual(set(stages), {"auth_db", "rate_limit", "redis", "audit"})
+
+
+class SnapshotWriterForkTests(SimpleTestCase):
+    def setUp(self):
+        self._writer = snapshot._writer_thread
+        self.addCleanup(setattr, snapshot, "_writer_thread", self._writer)
+
+    def test_forked_child_restarts_the_writer(self):
+        parent_thread = threading.Thread(target=lambda: None)
+        snapshot._writer_thread = parent_thread
+
+        loop = mock.Mock()
+        with self.settings(FLAG_SNAPSHOT_PATH=os.path.join(tempfile.gettempdir(), "fork-test.bin"),
+                           FLAG_SNAPSHOT_INTERVAL=3600), mock.patch.object(snapshot, "_writer_loop", loop):
+            snapshot._restart_writer_after_fork()
+            snapshot._writer_thread.join()
+
+        self.assertIsNot(snapshot._writer_thread, parent_thread)
+        loop.assert_called_once_with(3600)
+
+    def test_child_without_writer_starts_none(self):
+        snapshot._writer_thread = None
+        snapshot._restart_writer_after_fork()
+        self.assertIsNone(snapshot._writer_thread)
+
+
+class NamespaceAccessTests(FakeRedisMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        AdminUser.objects.create(
+            name="prod-admin", api_key="prod-key", scopes=["read", "write", "debug"], namespaces=["prod/*"]
+        )
+        self.client = Client(HTTP_X_ADMIN_KEY="prod-key")
+
+    def tearDown(self):
+        LOCAL_FEATURE_CACHE.clear()
+        super().tearDown()
+
+    def test_process_wide_endpoints_ignore_namespaces(self):
+        self.assertEqual(self.client.get("/flags/feature/runtime-stats/").status_code, 200)
+        self.assertNotEqual(self.client.get("/flags/debug/profile/").status_code, 403)
+
+    def test_flag_routes_are_limited_to_allowed_namespaces(self):
+        create = "/flags/{}feature/initialize/f/"
+        self.assertEqual(self.client.post(create.format("ns/prod/shop/"), "{}", content_type="application/json").status_code, 201)
+        self.assertEqual(self.client.post(create.format("ns/dev/shop/"), "{}", content_type="application/json").status_code, 403)
+        # legacy routes act on the default namespace
+        self.assertEqual(self.client.post(create.format(""), "{}", content_type="application/json").status_code, 403)
+
+
+class HttpCacheTests(FakeRedisMixin, TestCase):
+    url = "/flags/feature/status/dark_mode/"
+
+    def setUp(self):
+        super().setUp()
+        http_cache._bodies.clear()
+        AdminUser.objects.create(name="admin", api_key="test-key", scopes=["write"])
+        self.redis.set("feature:dark_mode", "1")
+
+    def tearDown(self):
+        http_cache._bodies.clear()
+        LOCAL_FEATURE_CACHE.clear()
+        super().tearDown()
+
+    def _toggle(self, enabled):
+        response = self.client.patch(
+            "/flags/feature/change-state/dark_mode/",
+            json.dumps({"enabled": enabled}),
+            content_type="application/json",
+            HTTP_X_ADMIN_KEY="test-key",
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_cache_headers(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(response["ETag"], '"0-1-t"')
+        self.assertEqual(
+            response["Cache-Control"],
+            f"public, max-age={settings.FLAG_STATUS_MAX_AGE}, "
+            f"stale-while-revalidate={settings.FLAG_STATUS_STALE_WHILE_REVALIDATE}, "
+            f"stale-if-error={settings.FLAG_STATUS_STALE_IF_ERROR}",
+        )
+        self.assertEqual(response["Vary"], "Accept")
+        self.assertFalse(response.has_header("Last-Modified"))       # never written since versioning
+
+    def test_last_modified_after_admin_write(self):
+        self._toggle(False)
+        modified_at = float(self.redis.hget("feature_version:feature:dark_mode", "ts"))
+
+        response = self.client.get(self.url)
+        self.assertEqual(response["Last-Modified"], http_date(modified_at))
+        self.assertEqual(response["ETag"], '"1-0-t"')
+
+    def test_if_none_match(self):
+        etag = self.client.get(self.url)["ETag"]
+
+        for header in (etag, f"W/{etag}", f'"other", {etag}', "*"):
+            with self.subTest(header=header):
+                response = self.client.get(self.url, HTTP_IF_NONE_MATCH=header)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response["ETag"], etag)
+                self.assertEqual(response.content, b"")
+
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH='"other"').status_code, 200)
+
+    def test_etag_changes_after_admin_write(self):
+        etag = self.client.get(self.url)["ETag"]
+        self._toggle(True)
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_json_and_text_negotiation(self):
+        text = self.client.get(self.url)
+        self.assertEqual(text.content, b"Feature 'dark_mode' active: True")
+        self.assertTrue(text["Content-Type"].startswith("text/html"))
+
+        for response in (
+            self.client.get(self.url, {"format": "json"}),
+            self.client.get(self.url, HTTP_ACCEPT="application/json"),
+        ):
+            self.assertEqual(response["Content-Type"], "application/json")
+            self.assertEqual(
+                response.json(),
+                {"feature": "dark_mode", "namespace": "default", "found": True, "active": True, "version": 0},
+            )
+            self.assertEqual(response["ETag"], '"0-1-j"')
+
+    def test_missing_flag(self):
+        response = self.client.get("/flags/feature/status/nope/", {"format": "json"})
+        self.assertIs(response.json()["found"], False)
+        self.assertEqual(response["ETag"], '"0-n-j"')
+
+    def test_serialized_bodies_are_reused_until_the_version_changes(self):
+        self.client.get(self.url)
+        entry = http_cache._bodies[("feature:dark_mode", False)]
+
+        self.client.get(self.url)
+        self.assertIs(http_cache._bodies[("feature:dark_mode", False)], entry)
+
+        self._toggle(False)
+        self.client.get(self.url)
+        self.assertIsNot(http_cache._bodies[("feature:dark_mode", False)], entry)
+
+    def test_fallback_is_not_cacheable_and_reports_unknown_flags(self):
+        self.client.get(self.url)                           # fills LOCAL_FEATURE_CACHE
+        self.redis_server.connected = False
+
+        with mock.patch.object(snapshot, "lookup", return_value=None):
+            cached = self.client.get(self.url, {"format": "json"})
+            unknown = self.client.get("/flags/feature/status/nope/", {"format": "json"})
+
+        for response in (cached, unknown):
+            self.assertEqual(response["Cache-Control"], "no-store")
+            self.assertEqual(response["X-Feature-Source"], "local_cache")
+            self.assertFalse(response.has_header("ETag"))
+
+        self.assertEqual((cached.json()["found"], cached.json()["active"]), (True, True))
+        self.assertEqual((unknown.json()["found"], unknown.json()["active"]), (False, False))
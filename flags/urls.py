@@ -8,4 +8,16 @@ urlpatterns = [
     path('feature/delete/<str:feature_name>/', views.delete_feature, name='delete_feature'),
     path('feature/list/', views.list_all_features, name='list_all_features'),
     path('feature/restore/<str:feature_name>/' , views.restore_feature, name='restore_feature'),
+    path('feature/stale/', views.stale_features, name='stale_features'),
+    path('feature/runtime-stats/', views.runtime_stats, name='runtime_stats'),
+    path('debug/profile/', views.profile_worker, name='profile_worker'),
+
+    # namespaced flags: same views scoped to one environment/project
+    path('ns/<slug:environment>/<slug:project>/feature/status/<str:feature_name>/', views.is_feature_active, name='ns_is_feature_active'),
+    path('ns/<slug:environment>/<slug:project>/feature/change-state/<str:feature_name>/', views.feature_status_change, name='ns_feature_status'),
+    path('ns/<slug:environment>/<slug:project>/feature/initialize/<str:feature_name>/', views.initialize_features, name='ns_initialize_features'),
+    path('ns/<slug:environment>/<slug:project>/feature/delete/<str:feature_name>/', views.delete_feature, name='ns_delete_feature'),
+    path('ns/<slug:environment>/<slug:project>/feature/list/', views.list_all_features, name='ns_list_all_features'),
+    path('ns/<slug:environment>/<slug:project>/feature/restore/<str:feature_name>/' , views.restore_feature, name='ns_restore_feature'),
+    path('ns/<slug:environment>/<slug:project>/feature/stale/', views.stale_features, name='ns_stale_features'),
 ]
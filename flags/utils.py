@@ -1,3 +1,36 @@
-def redis_key_generator(redis_domain_name,feature_name):
+import json
+
+DEFAULT_NAMESPACE = "default"     # flags created before namespaces existed live here, keys stay "feature:{name}"
+
+
+def redis_key_generator(redis_domain_name,feature_name, namespace=None):
+    if namespace and namespace != DEFAULT_NAMESPACE:
+        return f"{namespace}:{redis_domain_name}:{feature_name}"
     return f"{redis_domain_name}:{feature_name}"
 
+
+def namespace_from(environment=None, project=None):
+    # namespaced routes pass environment/project from the url, legacy routes pass nothing
+    if not environment or not project:
+        return DEFAULT_NAMESPACE
+    return f"{environment}/{project}"
+
+
+def feature_state_from_value(raw_value, unreadable=False):
+    # value can be "1"/"0" (legacy) or JSON (new) → same rules as is_feature_active
+    # anything unreadable (bad JSON, not an object) returns `unreadable`: False = fail closed
+    if raw_value in ("1", "0"):
+        return raw_value == "1"
+
+    try:
+        data = json.loads(raw_value)
+    except (TypeError, json.JSONDecodeError):
+        return unreadable
+
+    if not isinstance(data, dict):
+        return unreadable
+
+    if data.get("deleted") is True:
+        return False
+
+    return bool(data.get("enabled", False))
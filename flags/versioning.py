@@ -0,0 +1,44 @@
+# per-flag versions
+
+# flags/versioning.py
+#
+# Every admin write bumps a small hash next to the flag:
+#   feature_version:{redis_key} → v (incremented on each write), ts (unix time of the write)
+# and publishes the redis key on CHANGES_CHANNEL so long-running readers (the sidecar) can
+# refresh just that flag.
+#
+# The public status route reads it in the same round trip as the flag and uses it for
+# ETag / Last-Modified. Flags never written since versioning was added report version 0.
+
+import time
+
+from .redis_client import redis_client
+from . import utils
+
+CHANGES_CHANNEL = "feature_changes"
+
+
+def version_key(redis_key):
+    return utils.redis_key_generator("feature_version", redis_key)
+
+
+def record_write(pipe, redis_key):
+    # always called on the pipeline that carries the write itself
+    key = version_key(redis_key)
+    pipe.hincrby(key, "v", 1)
+    pipe.hset(key, "ts", time.time())
+    pipe.publish(CHANGES_CHANNEL, redis_key)
+
+
+def read_with_version(redis_key):
+    """Return (raw_value, version, modified_at) in one round trip; modified_at is None if unknown."""
+    pipe = redis_client.pipeline(transaction=False)
+    pipe.get(redis_key)
+    pipe.hmget(version_key(redis_key), "v", "ts")
+    raw_value, (version, modified_at) = pipe.execute()
+
+    return (
+        raw_value,
+        int(version) if version else 0,
+        float(modified_at) if modified_at else None,
+    )
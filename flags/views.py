@@ -1,6 +1,9 @@
+from django.conf import settings
 from django.http import HttpResponse, JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 import json
+import math
+import os
 import redis
 from redis.exceptions import RedisError
 
@@ -11,6 +14,21 @@ from .auth import admin_required
 from audit.utils import log_audit_event
 from .rate_limit import admin_rate_limit
 from .auth import require_scope
+from . import snapshot
+from . import namespaces
+from . import analytics
+from . import versioning
+from . import http_cache
+from .singleflight import SingleFlight, SingleFlightTimeout, all_stats
+from . import tracing
+from . import profiling
+
+STALE_AFTER_DAYS = 30      # default for the stale flag report
+
+# concurrent identical Redis reads share one round trip (see singleflight.py)
+flag_reads = SingleFlight("flag_reads")
+list_reads = SingleFlight("list_reads")
+
 
 # Create your views here.
 def home(request):
@@ -18,58 +36,57 @@ def home(request):
 
 @csrf_exempt
 # public rate limiter(in the future)
-def is_feature_active(request, feature_name):
+def is_feature_active(request, feature_name, environment=None, project=None):
     redis_domain_name = "feature"
-    redis_key = utils.redis_key_generator(redis_domain_name, feature_name)
+    namespace = utils.namespace_from(environment, project)
+    redis_key = utils.redis_key_generator(redis_domain_name, feature_name, namespace)
+    caller = request.META.get("HTTP_X_CLIENT_ID") or request.META.get("REMOTE_ADDR")
 
     try:
-        raw_value = redis_client.get(redis_key)           # Redis key format: "feature:{feature_name}" → value can be "1"/"0" (legacy) or JSON (new)
-
-        # feature not found → fail closed
-        if raw_value is None:
-            return HttpResponse(
-                f"Feature '{feature_name}' not found, active: False"
+        with tracing.stage("redis"):
+            raw_value, version, modified_at = flag_reads.do(                 # Redis key format: "feature:{feature_name}" → value can be "1"/"0" (legacy) or JSON (new)
+                redis_key,
+                lambda: versioning.read_with_version(redis_key),
+                timeout=settings.FLAG_SINGLEFLIGHT_TIMEOUT
             )
 
-        if raw_value in ("1", "0"):
-            is_active = (raw_value == "1")                     
-            LOCAL_FEATURE_CACHE[redis_key] = is_active              # update cache for legacy format 
-            return HttpResponse(                                   
-                f"Feature '{feature_name}' active: {is_active}"
-            )
+    except (redis.exceptions.ConnectionError,
+            redis.exceptions.TimeoutError,
+            RedisError,
+            SingleFlightTimeout):
+        # Redis down → fallback cache, then the on-disk snapshot
+        is_active = LOCAL_FEATURE_CACHE.get(redis_key)
+        if is_active is None:
+            is_active = snapshot.lookup(redis_key, None)
+
+        found = is_active is not None
+        if found:
+            analytics.record(redis_key, is_active, caller)
+        else:
+            is_active = False                                  # unknown flag → fail closed, not counted
+        return http_cache.fallback_response(request, feature_name, namespace, found, is_active)
 
-        # NEW FORMAT: JSON
-        try:
-            data = json.loads(raw_value)           # attempt to parse JSON value → if it fails, we treat it as corrupted and fail closed
-        except json.JSONDecodeError:
-            # corrupted value → fail closed
-            return HttpResponse(
-                f"Feature '{feature_name}' active: False"
-            )
+    found = raw_value is not None
+    is_active = False                                          # feature not found or corrupted → fail closed
 
-        # soft delete check
-        if data.get("deleted") is True:         
-            is_active = False       
-        else: 
-            is_active = bool(data.get("enabled", False))                    
+    if found:
+        # "1"/"0" (legacy) or JSON (new) — same rules as listings and the sidecar
+        state = utils.feature_state_from_value(raw_value, unreadable=None)
+        if state is not None:
+            is_active = state
+            LOCAL_FEATURE_CACHE[redis_key] = is_active          # update cache (corrupted value → cache untouched)
 
-        LOCAL_FEATURE_CACHE[redis_key] = is_active                     # update cache
+        analytics.record(redis_key, is_active, caller)        # misses are not counted (any name can be requested)
 
-    except (redis.exceptions.ConnectionError,
-            redis.exceptions.TimeoutError,
-            RedisError):
-        # Redis down → fallback cache
-        is_active = LOCAL_FEATURE_CACHE.get(redis_key, False)
-
-    return HttpResponse(
-        f"Feature '{feature_name}' active: {is_active}"
+    return http_cache.flag_status_response(
+        request, feature_name, namespace, redis_key, found, is_active, version, modified_at
     )
 
 @csrf_exempt
 @admin_required
 @admin_rate_limit
 @require_scope("write")
-def feature_status_change(request, feature_name):
+def feature_status_change(request, feature_name, environment=None, project=None):
     if request.method != "PATCH":
         return JsonResponse(
             {"error": "Invalid request method"},
@@ -77,10 +94,14 @@ def feature_status_change(request, feature_name):
         )
 
     redis_domain_name = "feature"
-    redis_key = utils.redis_key_generator(redis_domain_name, feature_name)
+    namespace = utils.namespace_from(environment, project)
+    redis_key = utils.redis_key_generator(redis_domain_name, feature_name, namespace)
 
     try:
-        if not redis_client.exists(redis_key):
+        with tracing.stage("redis"):
+            value = redis_client.get(redis_key)
+
+        if value is None:
             return JsonResponse(
                 {"error": "Feature not found"},
                 status=404
@@ -90,7 +111,6 @@ def feature_status_change(request, feature_name):
         data = json.loads(body)
 
         # state change should not be allowed if feature is soft deleted
-        value = redis_client.get(redis_key)
         if value not in ("1", "0"):
             try:
                 existing_data = json.loads(value)
@@ -118,18 +138,24 @@ def feature_status_change(request, feature_name):
             )
 
         redis_value = "1" if data["enabled"] else "0"
-        redis_client.set(redis_key, redis_value)
+        pipe = redis_client.pipeline()
+        pipe.set(redis_key, redis_value)
+        versioning.record_write(pipe, redis_key)
+        with tracing.stage("redis"):
+            pipe.execute()
 
         log_audit_event(
             action = "UPDATE",
             feature_name = feature_name,
             new_value = data["enabled"],
             performed_by = request.admin.name,
-            performed_by_id = request.admin.id
+            performed_by_id = request.admin.id,
+            namespace = namespace
         )
 
         # update cache ONLY after Redis success
         LOCAL_FEATURE_CACHE[redis_key] = data["enabled"]
+        snapshot.mark_dirty()
 
         return JsonResponse({
             "feature": feature_name,
@@ -149,7 +175,7 @@ def feature_status_change(request, feature_name):
 @admin_required           # redirect flow to auth.py -> admin_required -> _wrapped_view -> feature_status and then back to admin_required -> _wrapped_view -> feature_status
 @admin_rate_limit
 @require_scope("write")
-def initialize_features(request, feature_name):
+def initialize_features(request, feature_name, environment=None, project=None):
     if request.method != "POST":
         return JsonResponse(
             {"error": "Invalid request method"},
@@ -164,10 +190,14 @@ def initialize_features(request, feature_name):
         )
 
     redis_domain_name = "feature"
-    redis_key = utils.redis_key_generator(redis_domain_name, feature_name)
+    namespace = utils.namespace_from(environment, project)
+    redis_key = utils.redis_key_generator(redis_domain_name, feature_name, namespace)
 
     try:
-        if redis_client.exists(redis_key):
+        with tracing.stage("redis"):
+            exists = redis_client.exists(redis_key)
+
+        if exists:
             return JsonResponse(
                 {"error": "Feature already exists"},
                 status=409
@@ -183,18 +213,26 @@ def initialize_features(request, feature_name):
                     status=400
                 )
 
-        # always start disabled (A)
-        redis_client.set(redis_key, "0")
+        # always start disabled (A), indexed in the same round trip
+        pipe = redis_client.pipeline()
+        pipe.set(redis_key, "0")
+        versioning.record_write(pipe, redis_key)
+        namespaces.index_feature(namespace, feature_name, pipe)
+        with tracing.stage("redis"):
+            pipe.execute()
+
         log_audit_event(
             action = "CREATE",
             feature_name = feature_name,
             new_value = False,
             performed_by = request.admin.name,
-            performed_by_id = request.admin.id
+            performed_by_id = request.admin.id,
+            namespace = namespace
         )
 
         # update cache after Redis success
         LOCAL_FEATURE_CACHE[redis_key] = False
+        snapshot.mark_dirty()
 
         return JsonResponse(
             {
@@ -217,7 +255,7 @@ def initialize_features(request, feature_name):
 @admin_required
 @admin_rate_limit
 @require_scope("delete")
-def delete_feature(request, feature_name):
+def delete_feature(request, feature_name, environment=None, project=None):
     if request.method != "DELETE":
         return JsonResponse(
             {"error": "Invalid request method"},
@@ -225,34 +263,44 @@ def delete_feature(request, feature_name):
         )
 
     redis_domain_name = "feature"
-    redis_key = utils.redis_key_generator(redis_domain_name, feature_name)
+    namespace = utils.namespace_from(environment, project)
+    redis_key = utils.redis_key_generator(redis_domain_name, feature_name, namespace)
 
     try:
-        if not redis_client.exists(redis_key):
+        with tracing.stage("redis"):
+            exists = redis_client.exists(redis_key)
+
+        if not exists:
             return JsonResponse(
                 {"error": "Feature not found"},
                 status=404
             )
 
         # Soft delete: mark as deleted, key is not removed form redis 
-        redis_client.set(
+        pipe = redis_client.pipeline()
+        pipe.set(
             redis_key,
             json.dumps({
                 "enabled": False,
                 "deleted": True
             })
         )
+        versioning.record_write(pipe, redis_key)
+        with tracing.stage("redis"):
+            pipe.execute()
 
         log_audit_event(
             action="DELETE",
             feature_name=feature_name,
             new_value=None,
             performed_by=request.admin.name,
-            performed_by_id=request.admin.id
+            performed_by_id=request.admin.id,
+            namespace=namespace
         )
 
         # update cache after Redis success
         LOCAL_FEATURE_CACHE[redis_key] = False
+        snapshot.mark_dirty()
 
         return JsonResponse(
             {"message": f"Feature '{feature_name}' deleted successfully"}
@@ -271,7 +319,7 @@ def delete_feature(request, feature_name):
 @admin_required
 @admin_rate_limit
 @require_scope("read")
-def list_all_features(request):
+def list_all_features(request, environment=None, project=None):
 
     if request.method != "GET":
         return JsonResponse(
@@ -280,53 +328,63 @@ def list_all_features(request):
         )
     
     redis_domain_name = "feature"
-    pattern_key = utils.redis_key_generator(redis_domain_name, "*")
+    namespace = utils.namespace_from(environment, project)
+    key_prefix = utils.redis_key_generator(redis_domain_name, "", namespace)
 
     features = {}
 
     try:
-        cursor = 0
-        while True:
-            cursor, keys = redis_client.scan(
-                cursor=cursor,
-                match=pattern_key,
-                count=100
+        # namespace index + batched MGET → cost follows the namespace, not the keyspace
+        with tracing.stage("redis"):
+            flag_values = list_reads.do(
+                namespace,
+                lambda: list(namespaces.namespace_flag_values(namespace)),
+                timeout=settings.FLAG_SINGLEFLIGHT_TIMEOUT
             )
 
-            for key in keys:
-                feature_name = key.split(":", 1)[1]
-                value = redis_client.get(key)
-                is_active = (value == "1")
+        # fresh listing replaces this namespace's cached states, flags gone from Redis drop out
+        namespaces.invalidate_namespace_cache(namespace, [feature_name for feature_name, _, _ in flag_values])
 
-                # store in response
-                features[feature_name] = {
-                    "enabled": is_active
-                }
+        for feature_name, key, value in flag_values:
+            if value is None:
+                continue
 
-                # update local cache
-                LOCAL_FEATURE_CACHE[key] = is_active
+            is_active = utils.feature_state_from_value(value)
 
-            if cursor == 0:
-                break
+            # store in response
+            features[feature_name] = {
+                "enabled": is_active
+            }
+
+            # update local cache
+            LOCAL_FEATURE_CACHE[key] = is_active
 
         return JsonResponse(
-            {"features": features}
+            {"namespace": namespace, "features": features}
         )
 
     except (redis.exceptions.ConnectionError,
             redis.exceptions.TimeoutError,
-            RedisError):
+            RedisError,
+            SingleFlightTimeout):
+
+        # fallback to the on-disk snapshot, overridden by the fresher local cache
+        for key, is_active in snapshot.snapshot_items(key_prefix):
+            feature_name = key[len(key_prefix):]
+            features[feature_name] = {
+                "enabled": is_active
+            }
 
-        # fallback to local cache
         for key, is_active in LOCAL_FEATURE_CACHE.items():
-            if key.startswith(f"{redis_domain_name}:"):
-                feature_name = key.split(":", 1)[1]
+            if key.startswith(key_prefix):
+                feature_name = key[len(key_prefix):]
                 features[feature_name] = {
                     "enabled": is_active
                 }
 
         return JsonResponse(
             {
+                "namespace": namespace,
                 "features": features,
                 "source": "local_cache"
             },
@@ -338,7 +396,7 @@ def list_all_features(request):
 @admin_required
 @admin_rate_limit
 @require_scope("write")
-def restore_feature(request, feature_name):
+def restore_feature(request, feature_name, environment=None, project=None):
     if request.method != "POST":
         return JsonResponse(
             {"error": "Invalid request method"},
@@ -346,10 +404,12 @@ def restore_feature(request, feature_name):
         )
 
     redis_domain_name = "feature"
-    redis_key = utils.redis_key_generator(redis_domain_name, feature_name)
+    namespace = utils.namespace_from(environment, project)
+    redis_key = utils.redis_key_generator(redis_domain_name, feature_name, namespace)
 
     try:
-        raw_value = redis_client.get(redis_key)
+        with tracing.stage("redis"):
+            raw_value = redis_client.get(redis_key)
 
         if raw_value is None:
             return JsonResponse(
@@ -382,17 +442,23 @@ def restore_feature(request, feature_name):
         data["deleted"] = False
         data["enabled"] = False
 
-        redis_client.set(redis_key, json.dumps(data))
+        pipe = redis_client.pipeline()
+        pipe.set(redis_key, json.dumps(data))
+        versioning.record_write(pipe, redis_key)
+        with tracing.stage("redis"):
+            pipe.execute()
 
         log_audit_event(
             action="UPDATE",   # keep enum consistent for now
             feature_name=feature_name,
             new_value=False,
             performed_by=request.admin.name,
-            performed_by_id=request.admin.id
+            performed_by_id=request.admin.id,
+            namespace=namespace
         )
 
         LOCAL_FEATURE_CACHE[redis_key] = False
+        snapshot.mark_dirty()
 
         return JsonResponse(
             {
@@ -409,3 +475,118 @@ def restore_feature(request, feature_name):
             {"error": "Feature service temporarily unavailable"},
             status=503
         )
+
+
+@csrf_exempt
+@admin_required
+@admin_rate_limit
+@require_scope("read")
+def stale_features(request, environment=None, project=None):
+    if request.method != "GET":
+        return JsonResponse(
+            {"error": "Invalid request method"},
+            status=405
+        )
+
+    try:
+        days = float(request.GET.get("days", STALE_AFTER_DAYS))
+    except ValueError:
+        days = None
+
+    if days is None or not math.isfinite(days) or days < 0:
+        return JsonResponse(
+            {"error": '"days" must be a non-negative number'},
+            status=400
+        )
+
+    namespace = utils.namespace_from(environment, project)
+
+    try:
+        usage = analytics.flag_usage(namespace, stale_after=days * 24 * 3600)
+
+        return JsonResponse(
+            {
+                "namespace": namespace,
+                "stale_after_days": days,
+                "never_evaluated": usage["never_evaluated"],
+                "stale": usage["stale"],
+                "active_count": len(usage["active"])
+            }
+        )
+
+    except (redis.exceptions.ConnectionError,
+            redis.exceptions.TimeoutError,
+            RedisError):
+        return JsonResponse(
+            {"error": "Feature service temporarily unavailable"},
+            status=503
+        )
+
+
+@csrf_exempt
+@admin_required
+@admin_rate_limit
+@require_scope("read", namespaced=False)             # process-wide, no flag namespace
+def runtime_stats(request):
+    if request.method != "GET":
+        return JsonResponse(
+            {"error": "Invalid request method"},
+            status=405
+        )
+
+    # per-process counters, each worker reports its own
+    return JsonResponse(
+        {"singleflight": all_stats()}
+    )
+
+
+@csrf_exempt
+@admin_required
+@admin_rate_limit
+@require_scope("debug", namespaced=False)             # process-wide, no flag namespace
+def profile_worker(request):
+    # profiles are per worker process: POST starts one here, GET on the same worker fetches it
+    if request.method == "GET":
+        profile = profiling.last_profile()
+        if profile is None:
+            return JsonResponse(
+                {"error": "No completed profile in this worker", "pid": os.getpid(), "running": profiling.is_running()},
+                status=404
+            )
+
+        finished_at, stacks = profile
+        response = HttpResponse(stacks, content_type="text/plain; charset=utf-8")
+        response["Content-Disposition"] = f'attachment; filename="flag-profile-{os.getpid()}-{int(finished_at)}.collapsed"'
+        return response
+
+    if request.method != "POST":
+        return JsonResponse(
+            {"error": "Invalid request method"},
+            status=405
+        )
+
+    try:
+        seconds = float(request.GET.get("seconds", 10))
+        interval_ms = float(request.GET.get("interval_ms", 5))
+    except ValueError:
+        seconds = interval_ms = None
+
+    if seconds is None or not (math.isfinite(seconds) and math.isfinite(interval_ms)) or seconds <= 0 or interval_ms <= 0:
+        return JsonResponse(
+            {"error": '"seconds" and "interval_ms" must be positive numbers'},
+            status=400
+        )
+
+    # samples every thread of THIS worker from a background thread, the request returns at once
+    try:
+        seconds = profiling.start_profile(seconds, interval=interval_ms / 1000)
+    except profiling.ProfilerBusy as exc:
+        return JsonResponse(
+            {"error": str(exc)},
+            status=409
+        )
+
+    return JsonResponse(
+        {"message": "Profile started, GET this url on the same worker when it is done", "pid": os.getpid(), "seconds": seconds},
+        status=202
+    )